@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Benchmark `hash_passwords`/`verify_many` against sequential calls.
+
+Run from this directory: ./bench_batch_passwords.py [COUNT] [COST]
+"""
+import os
+import sys
+import time
+
+from encrypt_password import (hash_password, hash_passwords, is_valid,
+                              set_bcrypt_cost, verify_many)
+
+
+def rate(count: int, start: float) -> str:
+    """Format the throughput since `start`."""
+    return f'{count / (time.perf_counter() - start):8.1f}/s'
+
+
+def main() -> None:
+    """Print sequential and batch throughput for hashing and verifying."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    set_bcrypt_cost(int(sys.argv[2]) if len(sys.argv) > 2 else 8)
+    passwords = [f'MyAmazingPassw0rd{i}' for i in range(count)]
+    print(f'{os.cpu_count()} CPUs, {count} passwords')
+
+    start = time.perf_counter()
+    hashes = [hash_password(password) for password in passwords]
+    print(f'sequential hash:   {rate(count, start)}')
+    start = time.perf_counter()
+    assert all(is_valid(hashed, password)
+               for hashed, password in zip(hashes, passwords))
+    print(f'sequential verify: {rate(count, start)}')
+
+    for executor in ('thread', 'process'):
+        start = time.perf_counter()
+        hashes = [None] * count
+        for index, hashed in hash_passwords(iter(passwords),
+                                            executor=executor):
+            hashes[index] = hashed
+        print(f'{executor} hash:       {rate(count, start)}')
+        start = time.perf_counter()
+        pairs = zip(hashes, passwords)
+        assert all(ok for _, ok in verify_many(pairs, executor=executor))
+        print(f'{executor} verify:     {rate(count, start)}')
+
+
+if __name__ == '__main__':
+    main()
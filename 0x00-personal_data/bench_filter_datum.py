@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Microbenchmark of `filter_datum` against the per-field `re.sub` loop.
+
+Run from this directory: ./bench_filter_datum.py
+"""
+import re
+import timeit
+from typing import List
+
+from filtered_logger import filter_datum
+
+
+def per_field_filter_datum(fields: List[str], redaction: str,
+                           message: str, separator: str) -> str:
+    """The original implementation: one `re.sub` per field."""
+    for field in fields:
+        message = re.sub(f'{field}=(.*?){separator}',
+                         f'{field}={redaction}{separator}',
+                         message)
+    return message
+
+
+def make_message(fields: List[str]) -> str:
+    """Build a log line holding every field plus a few non-PII ones."""
+    pairs = [f'{field}=value_{i}' for i, field in enumerate(fields)]
+    pairs += ['ip=60ed:c396:2ff:244', 'last_login=2019-11-14 06:14:24']
+    return ';'.join(pairs) + ';'
+
+
+def main() -> None:
+    """Time both implementations at 3, 5, 50 and 500 fields."""
+    for size in (3, 5, 50, 500):
+        fields = [f'field{i}' for i in range(size)]
+        message = make_message(fields)
+        expected = per_field_filter_datum(fields, '***', message, ';')
+        assert filter_datum(fields, '***', message, ';') == expected
+        number = max(10, 20000 // size)
+        old = timeit.timeit(lambda: per_field_filter_datum(
+            fields, '***', message, ';'), number=number) / number
+        new = timeit.timeit(lambda: filter_datum(
+            fields, '***', message, ';'), number=number) / number
+        print(f'{size:>4} fields: per-field {old * 1e6:10.1f} us  '
+              f'single-pass {new * 1e6:8.1f} us  '
+              f'speedup x{old / new:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Benchmark `HashingService` throughput with 1, 2, 4 and 8 threads.
+
+Run from this directory: ./bench_hashing_service.py [HASHES]
+"""
+import os
+import sys
+import time
+
+from encrypt_password import HashingService, hash_password
+
+
+def main() -> None:
+    """Print hashes per second sequentially and for each pool size."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    passwords = [f'MyAmazingPassw0rd{i}' for i in range(count)]
+    print(f'{os.cpu_count()} CPUs, {count} hashes')
+    start = time.perf_counter()
+    for password in passwords:
+        hash_password(password)
+    seconds = time.perf_counter() - start
+    print(f'sequential: {count / seconds:7.1f} hashes/s')
+    for workers in (1, 2, 4, 8):
+        service = HashingService(workers, backlog=count)
+        start = time.perf_counter()
+        futures = [service.submit(hash_password, password)
+                   for password in passwords]
+        for future in futures:
+            future.result()
+        seconds = time.perf_counter() - start
+        stats = service.stats()
+        service.shutdown()
+        print(f'{workers} threads:  {count / seconds:7.1f} hashes/s  '
+              f'(avg latency {stats["latency_avg_ms"]:.1f} ms)')
+
+
+if __name__ == '__main__':
+    main()
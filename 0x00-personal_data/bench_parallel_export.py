@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Benchmark `parallel_export` with 1, 2, 4 and 8 worker processes.
+
+A users table is generated in a temporary SQLite database, used through
+the `PERSONAL_DATA_DB_BACKEND=sqlite` stand-in of `get_db`.
+
+Run from this directory: ./bench_parallel_export.py [ROWS]
+"""
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+
+from filtered_logger import parallel_export
+
+
+def generate(path: str, rows: int) -> None:
+    """Fill a users table with `rows` rows cycled from user_data.csv."""
+    with open('user_data.csv') as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        sample = list(reader)
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, {});'.format(
+        ', '.join(f'{column} TEXT' for column in columns)))
+    db.executemany('INSERT INTO users VALUES (?{});'.format(
+        ', ?' * len(columns)),
+        ([i] + sample[i % len(sample)] for i in range(rows)))
+    db.commit()
+    db.close()
+
+
+def main() -> None:
+    """Export the generated table with an increasing number of workers."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    directory = tempfile.mkdtemp(prefix='bench_export.')
+    path = os.path.join(directory, 'users.db')
+    generate(path, rows)
+    os.environ['PERSONAL_DATA_DB_BACKEND'] = 'sqlite'
+    os.environ['PERSONAL_DATA_DB_NAME'] = path
+
+    with open(os.devnull, 'w') as devnull:
+        for workers in (1, 2, 4, 8):
+            count, seconds = parallel_export(workers, stream=devnull)
+            print(f'{workers} workers: {count} rows in {seconds:6.2f}s '
+                  f'({count / seconds:9.0f} rows/s)')
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
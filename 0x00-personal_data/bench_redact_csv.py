@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark `redact_csv` against row-by-row redaction with `filter_datum`.
+
+A synthetic CSV shaped like user_data.csv is generated first.
+
+Run from this directory: ./bench_redact_csv.py [ROWS]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from filtered_logger import PII_FIELDS, filter_datum
+from redact_csv import redact_csv
+
+
+def generate(path: str, rows: int) -> None:
+    """Write `rows` rows cycled from user_data.csv to `path`."""
+    with open('user_data.csv', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        sample = list(reader)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(0, rows, len(sample)):
+            writer.writerows(sample[:rows - i])
+
+
+def row_by_row(src, dst) -> int:
+    """Render each row as a log line and redact it with `filter_datum`."""
+    reader = csv.reader(src)
+    header = next(reader)
+    count = 0
+    for row in reader:
+        msg = ''.join(f'{key}={val};' for key, val in zip(header, row))
+        dst.write(filter_datum(PII_FIELDS, '***', msg, ';') + '\n')
+        count += 1
+    return count
+
+
+def main() -> None:
+    """Time both paths on the same synthetic file."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    generate(path, rows)
+    with open(os.devnull, 'w') as devnull:
+        with open(path, newline='') as src:
+            count, seconds = redact_csv(src, devnull)
+        print(f'redact_csv:   {count} rows in {seconds:7.2f}s '
+              f'({count / seconds:9.0f} rows/s)')
+        start = time.perf_counter()
+        with open(path, newline='') as src:
+            count = row_by_row(src, devnull)
+        seconds = time.perf_counter() - start
+        print(f'filter_datum: {count} rows in {seconds:7.2f}s '
+              f'({count / seconds:9.0f} rows/s)')
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
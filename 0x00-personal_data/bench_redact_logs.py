@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark `redact_log_file` against a naive line-by-line loop.
+
+A log file of unredacted `[HOLBERTON]` lines is generated first.
+
+Run from this directory: ./bench_redact_logs.py [MIB]
+"""
+import csv
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+from filtered_logger import PII_FIELDS, filter_datum
+from redact_logs import redact_log_file
+
+
+def generate(path: str, size: int) -> None:
+    """Write about `size` bytes of log lines built from user_data.csv."""
+    with open('user_data.csv', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        lines = ''.join(
+            '[HOLBERTON] user_data INFO 2019-11-19 18:37:59,596: ' +
+            ''.join(f'{key}={val};' for key, val in zip(header, row)) +
+            '\n' for row in reader)
+    with open(path, 'w') as f:
+        for _ in range(size // len(lines) + 1):
+            f.write(lines)
+
+
+def naive(src: str, dst: str) -> None:
+    """Redact the file one line at a time with `filter_datum`."""
+    with open(src) as f, open(dst, 'w') as out:
+        for line in f:
+            out.write(filter_datum(PII_FIELDS, '***', line, ';'))
+
+
+def main() -> None:
+    """Time both paths on the same generated file."""
+    size = (int(sys.argv[1]) if len(sys.argv) > 1 else 512) << 20
+    directory = tempfile.mkdtemp(prefix='bench_logs.')
+    src, fast, slow = (os.path.join(directory, name)
+                       for name in ('src.log', 'mmap.log', 'naive.log'))
+    generate(src, size)
+    size, seconds = redact_log_file(src, fast)
+    print(f'mmap + pool: {seconds:6.2f}s '
+          f'({size / seconds / (1 << 20):7.1f} MiB/s)')
+    start = time.perf_counter()
+    naive(src, slow)
+    seconds = time.perf_counter() - start
+    print(f'line loop:   {seconds:6.2f}s '
+          f'({size / seconds / (1 << 20):7.1f} MiB/s)')
+    assert filecmp.cmp(fast, slow, shallow=False)
+    for path in (src, fast, slow):
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Benchmark the per-record cost of structured and free-text redaction.
+
+Run from this directory: ./bench_structured_logging.py
+"""
+import logging
+import timeit
+
+from filtered_logger import PII_FIELDS, RedactingFormatter
+
+
+ROW = {'name': 'Marlene Wood', 'email': 'hwestiii@att.net',
+       'phone': '(473) 401-4253', 'ssn': '261-72-6780',
+       'password': 'K5?BMNv', 'ip': '60ed:c396:2ff:244:bbd0:9208:26f2:93ea',
+       'last_login': '2019-11-14 06:14:24',
+       'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+
+
+def make_record(msg, args=()) -> logging.LogRecord:
+    """Build an INFO record of the `user_data` logger."""
+    return logging.LogRecord('user_data', logging.INFO, __file__, 0,
+                             msg, args, None)
+
+
+def main() -> None:
+    """Print the best of 5 costs of formatting a record on each path."""
+    text = ''.join(f'{key}={val};' for key, val in ROW.items())
+    template = ''.join(f'{key}=%({key})s;' for key in ROW)
+    regex = RedactingFormatter(PII_FIELDS)
+    structured = RedactingFormatter(PII_FIELDS, structured=True)
+    assert (regex.format(make_record(text)).split(': ', 1)[1] ==
+            structured.format(make_record(ROW)).split(': ', 1)[1])
+    cases = [
+        ('free text, regex', regex, lambda: make_record(text)),
+        ('mapping message', structured, lambda: make_record(ROW)),
+        ('mapping args', structured,
+         lambda: make_record(template, (ROW,))),
+    ]
+    number = 50000
+    for label, formatter, factory in cases:
+        best = float('inf')
+        for _ in range(5):
+            it = iter([factory() for _ in range(number)])
+            best = min(best, timeit.timeit(
+                lambda: formatter.format(next(it)), number=number))
+        print(f'{label:<18} {best / number * 1e6:6.2f} us/record')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Benchmark the regex and token redactors on adversarial log lines.
+
+Each line repeats `name=` with no separator at all, which makes the
+lazy regex scan to the end of the line from every occurrence.
+
+Run from this directory: ./bench_token_redactor.py
+"""
+import timeit
+
+from filtered_logger import PII_FIELDS, get_redactor
+
+
+def adversarial_line(length: int) -> str:
+    """Build a truncated line of `length` chars with no separator."""
+    chunk = 'name=xx email=yy '
+    return (chunk * (length // len(chunk) + 1))[:length]
+
+
+def main() -> None:
+    """Print the per-character cost of both redactors as lines grow."""
+    redactors = {mode: get_redactor(PII_FIELDS, '***', ';', mode)
+                 for mode in ('regex', 'token')}
+    for length in (1000, 4000, 16000, 64000):
+        line = adversarial_line(length)
+        results = []
+        for mode, redactor in redactors.items():
+            number = 3 if mode == 'regex' else 50
+            seconds = timeit.timeit(lambda: redactor.redact(line),
+                                    number=number) / number
+            results.append(f'{mode} {seconds * 1e9 / length:9.1f} ns/char')
+        print(f'{length:>6} chars: ' + '  '.join(results))
+
+
+if __name__ == '__main__':
+    main()
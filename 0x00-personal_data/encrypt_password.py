@@ -1,8 +1,88 @@
 #!/usr/bin/env python3
 """Ensures passwords aren't stored in plaintext within the database."""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, Future,
+                                ProcessPoolExecutor, ThreadPoolExecutor,
+                                wait)
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
 import bcrypt
 
 
+_bcrypt_cost = int(os.getenv('BCRYPT_COST', 12))
+MIN_BCRYPT_COST = int(os.getenv('BCRYPT_MIN_COST', 10))
+ALLOW_COST_DOWNGRADE = os.getenv('BCRYPT_ALLOW_DOWNGRADE', '0') == '1'
+
+
+def get_bcrypt_cost() -> int:
+    """Returns the bcrypt cost used for new hashes."""
+    return _bcrypt_cost
+
+
+def set_bcrypt_cost(cost: int) -> None:
+    """Set the bcrypt cost used for new hashes.
+
+    Args:
+        cost (int): log2 of the number of bcrypt rounds, 4 to 31.
+    """
+    global _bcrypt_cost
+    if not 4 <= cost <= 31:
+        raise ValueError(f'Invalid bcrypt cost: {cost}')
+    _bcrypt_cost = cost
+
+
+def calibrate_cost(target_ms: float = 250.0,
+                   min_cost: int = MIN_BCRYPT_COST,
+                   max_cost: int = 31) -> int:
+    """Pick the highest bcrypt cost hashing within `target_ms`.
+
+    Each cost is timed on this machine in turn; since one more unit of
+    cost doubles the hashing time, timing stops as soon as the next cost
+    would exceed the budget. The chosen cost becomes the current one.
+
+    Args:
+        target_ms (float): latency budget of one hash in milliseconds.
+        min_cost (int): lowest cost to pick even if it is over budget,
+                        `BCRYPT_MIN_COST` (default 10) by default.
+        max_cost (int): highest cost to consider.
+    Return:
+        int: the chosen cost.
+    """
+    cost = min_cost
+    for rounds in range(min_cost, max_cost + 1):
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+        elapsed = (time.perf_counter() - start) * 1000
+        if elapsed > target_ms:
+            break
+        cost = rounds
+        if elapsed * 2 > target_ms:
+            break
+    set_bcrypt_cost(cost)
+    return cost
+
+
+def hash_cost(hashed_password: bytes) -> int:
+    """Returns the cost a bcrypt hash was computed with.
+
+    Args:
+        hashed_password (bytes): hash such as `$2b$12$...`.
+    Return:
+        int: cost of the hash.
+    """
+    return int(hashed_password.split(b'$')[2])
+
+
+def _hash_with_cost(password: str, cost: int) -> bytes:
+    """Hash a password with an explicit bcrypt cost."""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(cost))
+
+
 def hash_password(password: str) -> bytes:
     """Generate a salted, hashed password for the plaintext password.
 
@@ -11,8 +91,7 @@ def hash_password(password: str) -> bytes:
     Return
         bytes: salted, hashed password.
     """
-    password = password.encode()
-    return bcrypt.hashpw(password, bcrypt.gensalt())
+    return _hash_with_cost(password, _bcrypt_cost)
 
 
 def is_valid(hashed_password: bytes, password: str) -> bool:
@@ -25,3 +104,292 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
         bool: whether entered password matches the stored password.
     """
     return bcrypt.checkpw(password.encode(), hashed_password)
+
+
+def verify_and_upgrade(hashed_password: bytes,
+                       password: str) -> Tuple[bool, Optional[bytes]]:
+    """Validate the plaintext password and rehash it if its cost is stale.
+
+    A hash made with a lower cost than the current one is upgraded. One
+    made with a higher cost is only rehashed down when
+    `BCRYPT_ALLOW_DOWNGRADE=1`, so a cost calibrated low on a loaded host
+    never weakens the stored hashes.
+
+    Args:
+        hashed_password (bytes): the `hashed_password` stored in the db.
+        password (str): plaintext password entered by user.
+    Return:
+        Tuple[bool, Optional[bytes]]: whether the password matches and,
+            when it does and the stored hash is stale, the new hash to
+            store.
+    """
+    if not is_valid(hashed_password, password):
+        return False, None
+    if not needs_rehash(hashed_password):
+        return True, None
+    return True, hash_password(password)
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """Whether a hash should be redone with the current cost.
+
+    Args:
+        hashed_password (bytes): the `hashed_password` stored in the db.
+    Return:
+        bool: True for a lower cost, or a higher one if downgrades are
+              allowed.
+    """
+    cost = hash_cost(hashed_password)
+    return cost < _bcrypt_cost or (cost > _bcrypt_cost
+                                   and ALLOW_COST_DOWNGRADE)
+
+
+EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+
+def _run_batch(func: Callable, calls: Iterable[tuple], workers: int,
+               executor: str,
+               progress: Callable[[int], None]) -> Iterator[Tuple[int, Any]]:
+    """Run `func` over argument tuples, yielding results as they complete.
+
+    At most four calls per worker are in flight, so `calls` is consumed
+    lazily and memory stays bounded however many items it yields.
+
+    Args:
+        func (Callable): function applied to each argument tuple.
+        calls (Iterable[tuple]): argument tuples.
+        workers (int): pool size, one per CPU by default.
+        executor (str): `thread` or `process`.
+        progress (Callable[[int], None]): called with the number of
+                                          completed calls.
+    Return:
+        Iterator[Tuple[int, Any]]: position of the call and its result.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f'Unknown executor: {executor}')
+    workers = workers or os.cpu_count() or 1
+    calls = enumerate(calls)
+    done_count = 0
+    with EXECUTORS[executor](workers) as pool:
+        pending = {}
+        while True:
+            for index, args in islice(calls, 4 * workers - len(pending)):
+                pending[pool.submit(func, *args)] = index
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                done_count += 1
+                if progress is not None:
+                    progress(done_count)
+                yield pending.pop(future), future.result()
+
+
+def hash_passwords(passwords: Iterable[str], workers: int = None,
+                   executor: str = 'thread',
+                   progress: Callable[[int], None] = None
+                   ) -> Iterator[Tuple[int, bytes]]:
+    """Hash many passwords in parallel, streaming the hashes back.
+
+    Args:
+        passwords (Iterable[str]): passwords in plaintext, possibly a
+                                   generator.
+        workers (int): pool size, one per CPU by default.
+        executor (str): `thread` or `process` pool.
+        progress (Callable[[int], None]): called with the number of
+                                          passwords hashed so far.
+    Return:
+        Iterator[Tuple[int, bytes]]: position of each password in
+            `passwords` and its hash, in order of completion.
+    """
+    calls = ((password, _bcrypt_cost) for password in passwords)
+    return _run_batch(_hash_with_cost, calls, workers, executor, progress)
+
+
+def verify_many(pairs: Iterable[Tuple[bytes, str]], workers: int = None,
+                executor: str = 'thread',
+                progress: Callable[[int], None] = None
+                ) -> Iterator[Tuple[int, bool]]:
+    """Validate many passwords in parallel, streaming the results back.
+
+    Args:
+        pairs (Iterable[Tuple[bytes, str]]): stored hash and plaintext
+                                             password, as for `is_valid`.
+        workers (int): pool size, one per CPU by default.
+        executor (str): `thread` or `process` pool.
+        progress (Callable[[int], None]): called with the number of
+                                          pairs checked so far.
+    Return:
+        Iterator[Tuple[int, bool]]: position of each pair in `pairs` and
+            whether it matches, in order of completion.
+    """
+    return _run_batch(is_valid, pairs, workers, executor, progress)
+
+
+class HashingServiceFull(Exception):
+    """Raised when the hashing service has no room left in its backlog."""
+
+
+class HashingService:
+    """Runs bcrypt on a bounded pool of threads.
+
+    bcrypt releases the GIL while hashing, so `workers` hashes run in
+    parallel. At most `workers + backlog` calls are accepted at once;
+    further calls raise `HashingServiceFull` instead of queueing without
+    bound.
+    """
+
+    def __init__(self, workers: int = None, backlog: int = None):
+        """Initialization of variables.
+
+        Args:
+            workers (int): number of hashing threads, one per CPU by
+                           default.
+            backlog (int): number of calls allowed to wait for a thread,
+                           16 per worker by default.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.backlog = 16 * self.workers if backlog is None else backlog
+        self._executor = ThreadPoolExecutor(self.workers,
+                                            thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.workers +
+                                                 self.backlog)
+        self._lock = threading.Lock()
+        self._accepted = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _timed(self, func: Callable, *args):
+        """Run `func` on a worker thread and record its latency."""
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+
+    def _done(self, future: Future) -> None:
+        """Free the backlog slot of a finished call."""
+        with self._lock:
+            self._accepted -= 1
+        self._slots.release()
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Schedule `func(*args)` on the pool.
+
+        Raise:
+            HashingServiceFull: when the backlog is full.
+        Return:
+            Future: future holding the result of the call.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingServiceFull(f'{self.backlog} calls already queued')
+        with self._lock:
+            self._accepted += 1
+        try:
+            future = self._executor.submit(self._timed, func, *args)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def hash_password(self, password: str) -> bytes:
+        """Hash a password on the pool and wait for the result."""
+        return self.submit(hash_password, password).result()
+
+    def is_valid(self, hashed_password: bytes, password: str) -> bool:
+        """Validate a password on the pool and wait for the result."""
+        return self.submit(is_valid, hashed_password, password).result()
+
+    async def hash_password_async(self, password: str) -> bytes:
+        """Hash a password on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(hash_password,
+                                                     password))
+
+    async def is_valid_async(self, hashed_password: bytes,
+                             password: str) -> bool:
+        """Validate a password on the pool without blocking the loop."""
+        return await asyncio.wrap_future(self.submit(is_valid,
+                                                     hashed_password,
+                                                     password))
+
+    def stats(self) -> dict:
+        """Returns the usage statistics of the service.
+
+        Return:
+            dict: number of workers, backlog size, calls waiting for a
+                  thread (queue depth) and running, completed and
+                  rejected calls, average and maximum hash latency in
+                  milliseconds.
+        """
+        with self._lock:
+            completed = self._completed
+            return {
+                'workers': self.workers,
+                'backlog': self.backlog,
+                'queue_depth': self._accepted - self._running,
+                'running': self._running,
+                'completed': completed,
+                'rejected': self._rejected,
+                'latency_avg_ms': (self._latency_total / completed * 1000
+                                   if completed else 0.0),
+                'latency_max_ms': self._latency_max * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads once the accepted calls are done."""
+        self._executor.shutdown(wait=wait)
+
+
+@lru_cache(maxsize=None)
+def get_hashing_service() -> HashingService:
+    """Returns the process-wide hashing service.
+
+    Its worker count is read from `HASHING_WORKERS`, one per CPU by
+    default.
+    """
+    workers = int(os.getenv('HASHING_WORKERS', 0)) or None
+    return HashingService(workers)
+
+
+async def hash_password_async(password: str) -> bytes:
+    """`hash_password` run on the shared hashing service.
+
+    Args:
+        password (str): password in plaintext.
+    Return
+        bytes: salted, hashed password.
+    """
+    return await get_hashing_service().hash_password_async(password)
+
+
+async def is_valid_async(hashed_password: bytes, password: str) -> bool:
+    """`is_valid` run on the shared hashing service.
+
+    Args:
+        hashed_password (bytes): the `hashed_password` stored in the db.
+        password (str): plaintext password entered by user.
+    Return:
+        bool: whether entered password matches the stored password.
+    """
+    return await get_hashing_service().is_valid_async(hashed_password,
+                                                      password)
+
+
+if os.getenv('BCRYPT_TARGET_MS'):
+    calibrate_cost(float(os.getenv('BCRYPT_TARGET_MS')))
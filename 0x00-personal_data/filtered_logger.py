@@ -3,14 +3,148 @@
 
 Regex is used to filter out log messages of certain field values.
 """
+import argparse
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import re
-from mysql.connector import connection
-from typing import List
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from mysql.connector import connection, pooling
+from typing import (Callable, Iterator, List, Mapping, Optional, Sequence,
+                    TextIO, Tuple)
 
 
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))).union(
+    ('message', 'asctime'))
+
+
+class RegexRedactor:
+    """Obfuscates a set of fields in a single pass over a log line.
+
+    The fields are folded into one alternation pattern that is compiled
+    once, so each message is scanned a single time however many fields
+    there are. Matches are replaced through a callable, which is cheaper
+    than expanding a `\\1` template. Below `ALTERNATION_MIN_FIELDS`
+    fields, or when the redaction could itself be matched by a later
+    field (it contains `=` or the separator) or holds escapes, one
+    pattern per field is kept so the output stays identical to
+    redacting field by field.
+    """
+
+    ALTERNATION_MIN_FIELDS = 4
+
+    def __init__(self, fields: Tuple[str, ...], redaction: str,
+                 separator: str):
+        """Compile the pattern for the given fields and separator.
+
+        Args:
+            fields (Tuple[str, ...]): fields to obfuscate.
+            redaction (str): string to obfuscate the given fields with.
+            separator (str): string separating all fields in the log line.
+        """
+        self.fields = fields
+        if (len(fields) < self.ALTERNATION_MIN_FIELDS
+                or '=' in redaction or separator in redaction
+                or '\\' in redaction + separator):
+            self._subs = [(re.compile(f'{field}=(.*?){separator}').sub,
+                           f'{field}={redaction}{separator}')
+                          for field in fields]
+        else:
+            suffix = f'={redaction}{separator}'
+            pattern = re.compile(f'({"|".join(fields)})=.*?{separator}')
+            self._subs = [(pattern.sub, lambda match: match[1] + suffix)]
+
+    def redact(self, message: str) -> str:
+        """Returns the obfuscated log message.
+
+        Args:
+            message (str): string representing the log line.
+        Return:
+            str: obfuscated log message.
+        """
+        for sub, replacement in self._subs:
+            message = sub(replacement, message)
+        return message
+
+
+class TokenRedactor:
+    """Obfuscates fields by tokenizing a log line into `key=value` pairs.
+
+    The line is split on the separator once and every token is looked at
+    once, so the cost is linear in the length of the message whatever it
+    contains. A token is obfuscated from the first `=` whose key ends
+    with one of the fields to its end, so everything the regex path
+    masks is masked too; unlike the regex path, a trailing value with no
+    closing separator is obfuscated as well.
+    """
+
+    def __init__(self, fields: Tuple[str, ...], redaction: str,
+                 separator: str):
+        """Prepare the field lookup.
+
+        Args:
+            fields (Tuple[str, ...]): fields to obfuscate.
+            redaction (str): string to obfuscate the given fields with.
+            separator (str): string separating all fields in the log line.
+        """
+        self.fields = fields
+        self._keys = tuple(fields)
+        self._redaction = redaction
+        self._separator = separator
+
+    def redact(self, message: str) -> str:
+        """Returns the obfuscated log message.
+
+        Args:
+            message (str): string representing the log line.
+        Return:
+            str: obfuscated log message.
+        """
+        keys = self._keys
+        tokens = message.split(self._separator)
+        for i, token in enumerate(tokens):
+            eq = token.find('=')
+            while eq >= 0:
+                if token.endswith(keys, 0, eq):
+                    tokens[i] = f'{token[:eq + 1]}{self._redaction}'
+                    break
+                eq = token.find('=', eq + 1)
+        return self._separator.join(tokens)
+
+
+REDACTORS = {
+    'regex': RegexRedactor,
+    'token': TokenRedactor,
+}
+
+
+@lru_cache(maxsize=128)
+def get_redactor(fields: Tuple[str, ...], redaction: str,
+                 separator: str, mode: str = 'regex'):
+    """Returns the cached redactor for a field set and separator.
+
+    Args:
+        fields (Tuple[str, ...]): fields to obfuscate.
+        redaction (str): string to obfuscate the given fields with.
+        separator (str): string separating all fields in the log line.
+        mode (str): one of the keys of `REDACTORS`.
+    Return:
+        RegexRedactor | TokenRedactor: redactor shared by all callers.
+    """
+    if mode not in REDACTORS:
+        raise ValueError(f'Unknown redaction mode: {mode}')
+    return REDACTORS[mode](fields, redaction, separator)
 
 
 def filter_datum(fields: List[str], redaction: str,
@@ -27,11 +161,8 @@ def filter_datum(fields: List[str], redaction: str,
     Return:
         str: obfuscated log message.
     """
-    for field in fields:
-        message = re.sub(f'{field}=(.*?){separator}',
-                         f'{field}={redaction}{separator}',
-                         message)
-    return message
+    redactor = get_redactor(tuple(fields), redaction, separator)
+    return redactor.redact(message)
 
 
 class RedactingFormatter(logging.Formatter):
@@ -42,18 +173,33 @@ class RedactingFormatter(logging.Formatter):
     FORMAT = "[HOLBERTON] %(name)s %(levelname)s %(asctime)-15s: %(message)s"
     SEPARATOR = ";"
 
-    def __init__(self, fields: List[str]):
+    def __init__(self, fields: List[str], mode: str = 'regex',
+                 structured: bool = False):
         """Initialization of variables.
 
         Args:
             fields (List[str]): list of strings representing the
                                 fields to obfuscate.
+            mode (str): `regex` to redact like `filter_datum` or `token`
+                        to use the linear-time `TokenRedactor`.
+            structured (bool): redact mappings passed as the message or
+                               as `record.args` before rendering them.
         """
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self.structured = structured
+        self._lookup = frozenset(fields)
+        self._extra_fields = tuple(self._lookup.difference(
+            RECORD_ATTRIBUTES))
+        self._redactor = get_redactor(tuple(fields), self.REDACTION,
+                                      self.SEPARATOR, mode)
 
     def format(self, record: logging.LogRecord) -> str:
-        """Filter values in incomming log records using `filter_datum`.
+        """Filter values in incomming log records.
+
+        In structured mode a record carrying a mapping is redacted field
+        by field without any pattern matching; free-text messages always
+        go through the redactor selected by `mode` at initialization.
 
         Args:
             record (logging.LogRecord): contains all the info pertinent
@@ -61,57 +207,602 @@ class RedactingFormatter(logging.Formatter):
         Return:
             str: obfuscated log message.
         """
+        if self.structured:
+            message = self.redact_message(record)
+            if message is not None:
+                return self.format_redacted(record, message)
         msg = super(RedactingFormatter, self).format(record)
-        return filter_datum(self.fields, self.REDACTION,
-                            msg, self.SEPARATOR)
+        return self._redactor.redact(msg)
+
+    def formatException(self, exc_info) -> str:
+        """Returns the traceback of an exception, obfuscated.
+
+        Args:
+            exc_info (tuple): exception type, value and traceback.
+        Return:
+            str: obfuscated traceback.
+        """
+        text = super(RedactingFormatter, self).formatException(exc_info)
+        return self._redactor.redact(text)
+
+    def formatStack(self, stack_info: str) -> str:
+        """Returns the stack information of a record, obfuscated.
+
+        Args:
+            stack_info (str): stack information of the record.
+        Return:
+            str: obfuscated stack information.
+        """
+        text = super(RedactingFormatter, self).formatStack(stack_info)
+        return self._redactor.redact(text)
+
+    def redact_message(self, record: logging.LogRecord) -> Optional[str]:
+        """Returns the message of a structured record, fields redacted.
+
+        A mapping logged as the message is rendered as `key=value;` pairs
+        and a mapping passed as `record.args` is redacted before being
+        interpolated.
+
+        Args:
+            record (logging.LogRecord): record to redact.
+        Return:
+            Optional[str]: redacted message or None for a free-text one.
+        """
+        lookup = self._lookup
+        if isinstance(record.msg, Mapping):
+            separator = self.SEPARATOR
+            redacted = f'={self.REDACTION}{separator}'
+            return ''.join([
+                f'{key}{redacted}' if key in lookup
+                else f'{key}={val}{separator}'
+                for key, val in record.msg.items()])
+        if isinstance(record.args, Mapping) and record.args:
+            return str(record.msg) % {
+                key: self.REDACTION if key in lookup else val
+                for key, val in record.args.items()}
+        return None
+
+    def format_redacted(self, record: logging.LogRecord,
+                        message: str) -> str:
+        """Format a record in place with an already redacted message.
+
+        The message, arguments and the attributes set through `extra`
+        that are named after a field are swapped in for the call and put
+        back afterwards, so the record is not copied. The traceback and
+        stack are redacted like free text.
+
+        Args:
+            record (logging.LogRecord): record to format.
+            message (str): redacted message of the record.
+        Return:
+            str: formatted log line.
+        """
+        attrs = record.__dict__
+        saved = {name: attrs[name] for name in self._extra_fields
+                 if name in attrs}
+        for name in saved:
+            attrs[name] = self.REDACTION
+        saved['msg'] = record.msg
+        saved['args'] = record.args
+        record.msg = message
+        record.args = ()
+        if record.exc_text:
+            saved['exc_text'] = record.exc_text
+            record.exc_text = self._redactor.redact(record.exc_text)
+        try:
+            return super(RedactingFormatter, self).format(record)
+        finally:
+            attrs.update(saved)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records on a bounded queue for a background listener.
+
+    When the queue is full the `block` policy waits for room while the
+    `drop` policy discards the record and counts it in `dropped`.
+    """
 
+    POLICIES = ('block', 'drop')
 
-def get_logger() -> logging.Logger:
+    def __init__(self, log_queue: queue.Queue, policy: str = 'block'):
+        """Initialization of variables.
+
+        Args:
+            log_queue (queue.Queue): bounded queue shared with the listener.
+            policy (str): what to do when the queue is full.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown queue policy: {policy}')
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put the record on the queue according to `policy`."""
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogListener(logging.handlers.QueueListener):
+    """Formats and writes queued records on a background thread.
+
+    Stopping waits for room to enqueue the sentinel, so every record
+    already accepted is written out, and is safe to call more than once.
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """Block until the sentinel fits on the bounded queue."""
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        """Flush the queue and join the background thread."""
+        if self._thread is not None:
+            super(AsyncLogListener, self).stop()
+
+
+def get_logger(asynchronous: bool = False, capacity: int = 10000,
+               policy: str = 'block') -> logging.Logger:
     """Returns a logger named `user_data` and logs upto `logging.INFO`.
 
     This logger doesn't propagate messages to other loggers and has
     a `StreamHandler` with `RedactingFormatter` as formatter. Uses
-    `PII_FIELDS` to parameterize the formatter.
+    `PII_FIELDS` to parameterize the formatter. The logger is only
+    configured on the first call; later calls return it unchanged.
+
+    In asynchronous mode callers only enqueue records on a queue of
+    `capacity` records; an `AsyncLogListener` redacts and writes them on
+    a background thread and is stopped, flushing the queue, at exit.
+
+    Args:
+        asynchronous (bool): format and write records off the caller's
+                             thread.
+        capacity (int): maximum number of records waiting in the queue.
+        policy (str): `block` or `drop` when the queue is full.
     """
     logger = logging.getLogger('user_data')
+    if logger.handlers:
+        return logger
     logger.propagate = False
     logger.setLevel(logging.INFO)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     formatter = RedactingFormatter(PII_FIELDS)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    if not asynchronous:
+        logger.addHandler(console_handler)
+        return logger
+
+    log_queue = queue.Queue(maxsize=capacity)
+    queue_handler = BoundedQueueHandler(log_queue, policy)
+    listener = AsyncLogListener(log_queue, console_handler,
+                                respect_handler_level=True)
+    queue_handler.listener = listener
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
 
     return logger
 
 
+def _mysql_config() -> dict:
+    """Returns the MySQL connection settings from the environment."""
+    return {
+        'user': os.getenv('PERSONAL_DATA_DB_USERNAME', 'root'),
+        'password': os.getenv('PERSONAL_DATA_DB_PASSWORD', ''),
+        'host': os.getenv('PERSONAL_DATA_DB_HOST', 'localhost'),
+        'database': os.getenv('PERSONAL_DATA_DB_NAME')
+    }
+
+
 def get_db() -> connection.MySQLConnection:
     """Obtain a connector to the database.
 
+    Setting `PERSONAL_DATA_DB_BACKEND` to `sqlite` opens the SQLite file
+    named by `PERSONAL_DATA_DB_NAME` instead, as a local stand-in for the
+    MySQL server.
+
     Return:
         connection.MySQLConnection: connector to the database.
     """
-    user = os.getenv('PERSONAL_DATA_DB_USERNAME', 'root')
-    pwd = os.getenv('PERSONAL_DATA_DB_PASSWORD', '')
-    host = os.getenv('PERSONAL_DATA_DB_HOST', 'localhost')
-    db = os.getenv('PERSONAL_DATA_DB_NAME')
+    if os.getenv('PERSONAL_DATA_DB_BACKEND', 'mysql') == 'sqlite':
+        return sqlite3.connect(os.getenv('PERSONAL_DATA_DB_NAME'))
+    return connection.MySQLConnection(**_mysql_config())
 
-    config = {
-        'user': user,
-        'password': pwd,
-        'host': host,
-        'database': db
-    }
-    return connection.MySQLConnection(**config)
+
+class ConnectionPool:
+    """Bounded pool of reusable database connections.
+
+    At most `size` connections are checked out at once; `acquire` waits
+    up to `timeout` seconds for one to be released and then raises
+    `TimeoutError`. Connections come from the `connect` callable and are
+    prepared for their next caller by the `recycle` callable, so the
+    pool works the same over any backend.
+    """
+
+    def __init__(self, connect: Callable[[], object], size: int = 5,
+                 timeout: float = 30.0,
+                 recycle: Callable[[object], bool] = None):
+        """Initialization of variables.
+
+        Args:
+            connect (Callable[[], object]): opens a new connection.
+            size (int): maximum number of connections checked out at once.
+            timeout (float): seconds to wait for a free connection.
+            recycle (Callable[[object], bool]): resets a released
+                connection and returns whether to keep it idle here. A
+                backend pooling connections itself gives it back there
+                and returns False. Connections are kept as they are if
+                None.
+        """
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect
+        self._recycle = recycle
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def acquire(self):
+        """Check a connection out of the pool, opening one if none is idle.
+
+        Return:
+            object: a connection to give back with `release`.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f'No connection free after '
+                                   f'{self.timeout}s')
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+        return conn
+
+    def release(self, conn) -> None:
+        """Give a connection back to the pool.
+
+        A connection failing to reset is dropped and the error raised.
+
+        Args:
+            conn (object): connection obtained from `acquire`.
+        """
+        try:
+            if self._recycle is None or self._recycle(conn):
+                self._idle.put(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager checking a connection out for the block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        """Returns the usage statistics of the pool.
+
+        Return:
+            dict: size, in-use and idle connections, number of checkouts,
+                  waits and timeouts, average and maximum checkout latency
+                  in milliseconds.
+        """
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'checkout_avg_ms': (self._latency_total / checkouts * 1000
+                                    if checkouts else 0.0),
+                'checkout_max_ms': self._latency_max * 1000,
+            }
+
+    def close(self) -> None:
+        """Close every connection kept idle in this pool.
+
+        Connections given back to a backend pool are left to it.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _mysql_recycle(conn: pooling.PooledMySQLConnection) -> bool:
+    """Gives a connection back to its `MySQLConnectionPool`.
+
+    Unread results are consumed first so that `close` can reset the
+    session, which also rolls back an open transaction.
+    """
+    if conn.unread_result:
+        conn.consume_results()
+    conn.close()
+    return False
+
+
+def _sqlite_recycle(conn: sqlite3.Connection) -> bool:
+    """Rolls back the open transaction of a connection kept idle."""
+    conn.rollback()
+    return True
+
+
+def _mysql_connector(
+        size: int) -> Tuple[Callable[[], object], Callable[[object], bool]]:
+    """Returns the callables drawing from a `MySQLConnectionPool`."""
+    pool = pooling.MySQLConnectionPool(pool_name='user_data',
+                                       pool_size=size, **_mysql_config())
+    return pool.get_connection, _mysql_recycle
+
+
+def _sqlite_connector(
+        size: int) -> Tuple[Callable[[], object], Callable[[object], bool]]:
+    """Returns the callables opening and resetting the SQLite stand-in."""
+    path = os.getenv('PERSONAL_DATA_DB_NAME')
+    return (lambda: sqlite3.connect(path, check_same_thread=False),
+            _sqlite_recycle)
+
+
+POOL_BACKENDS = {
+    'mysql': _mysql_connector,
+    'sqlite': _sqlite_connector,
+}
+
+
+@lru_cache(maxsize=None)
+def get_db_pool() -> ConnectionPool:
+    """Returns the process-wide pool of database connections.
+
+    The backend follows `PERSONAL_DATA_DB_BACKEND` like `get_db`; the
+    pool size and checkout timeout are read from
+    `PERSONAL_DATA_DB_POOL_SIZE` (default 5) and
+    `PERSONAL_DATA_DB_POOL_TIMEOUT` (default 30 seconds).
+
+    Return:
+        ConnectionPool: pool shared by all callers.
+    """
+    backend = os.getenv('PERSONAL_DATA_DB_BACKEND', 'mysql')
+    if backend not in POOL_BACKENDS:
+        raise ValueError(f'Unknown database backend: {backend}')
+    size = int(os.getenv('PERSONAL_DATA_DB_POOL_SIZE', 5))
+    timeout = float(os.getenv('PERSONAL_DATA_DB_POOL_TIMEOUT', 30))
+    connect, recycle = POOL_BACKENDS[backend](size)
+    return ConnectionPool(connect, size, timeout, recycle)
+
+
+def row_template(columns: Sequence[str], separator: str = ';') -> str:
+    """Returns a `str.format` template rendering a row as `key=value;`.
+
+    Args:
+        columns (Sequence[str]): column names of the rows.
+        separator (str): string separating the fields.
+    Return:
+        str: template taking the row values positionally.
+    """
+    escaped = (column.replace('{', '{{').replace('}', '}}')
+               for column in columns)
+    return ''.join(f'{column}={{}}{separator}' for column in escaped)
+
+
+def fetch_batches(cursor, batch_size: int) -> Iterator[list]:
+    """Yield the rows of an executed cursor `batch_size` rows at a time.
+
+    Args:
+        cursor: executed DB-API cursor.
+        batch_size (int): number of rows fetched per round trip.
+    """
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def stream_users(db, batch_size: int = 1000, stream: TextIO = None,
+                 query: str = 'SELECT * FROM users;') -> Tuple[int, float]:
+    """Write every row of the users table redacted, one batch at a time.
+
+    Rows are read with an unbuffered cursor, rendered with a template
+    built once for the column set, redacted with `RedactingFormatter`
+    and written with a single `write` per batch, so memory is bounded by
+    `batch_size` whatever the size of the table.
+
+    Args:
+        db: DB-API connection returned by `get_db`.
+        batch_size (int): number of rows fetched and written at a time.
+        stream (TextIO): where to write the lines, `sys.stderr` like the
+                         `user_data` logger by default.
+        query (str): query selecting the rows to export.
+    Return:
+        Tuple[int, float]: number of rows exported and seconds taken.
+    """
+    stream = sys.stderr if stream is None else stream
+    formatter = RedactingFormatter(PII_FIELDS)
+    start = time.perf_counter()
+    try:
+        cursor = db.cursor(buffered=False)
+    except TypeError:
+        cursor = db.cursor()
+    cursor.execute(query)
+    template = row_template([desc[0] for desc in cursor.description])
+    count = 0
+    for rows in fetch_batches(cursor, batch_size):
+        lines = []
+        for row in rows:
+            record = logging.LogRecord('user_data', logging.INFO, __file__,
+                                       0, template.format(*row), None, None)
+            lines.append(formatter.format(record))
+        stream.write('\n'.join(lines) + '\n')
+        count += len(rows)
+    stream.flush()
+    cursor.close()
+    return count, time.perf_counter() - start
+
+
+def key_ranges(db, key: str, partitions: int) -> List[Tuple[int, int]]:
+    """Split the users table into contiguous primary-key ranges.
+
+    Args:
+        db: DB-API connection returned by `get_db`.
+        key (str): integer primary-key column of the users table.
+        partitions (int): number of ranges to split the table into.
+    Return:
+        List[Tuple[int, int]]: half-open `[low, high)` ranges in key order.
+    """
+    cursor = db.cursor()
+    cursor.execute(f'SELECT MIN({key}), MAX({key}) FROM users;')
+    low, high = cursor.fetchone()
+    cursor.close()
+    if low is None:
+        return []
+    step = -(-(high - low + 1) // partitions)
+    return [(start, min(start + step, high + 1))
+            for start in range(low, high + 1, step)]
+
+
+def export_partition(task: Tuple[str, int, int, int, str]) -> int:
+    """Redact one key range of the users table into a file.
+
+    Runs in a worker process with its own `get_db()` connection.
+
+    Args:
+        task (Tuple[str, int, int, int, str]): key column, low and high
+            bounds of the range, batch size and output file path.
+    Return:
+        int: number of rows exported.
+    """
+    key, low, high, batch_size, path = task
+    query = (f'SELECT * FROM users WHERE {key} >= {low} '
+             f'AND {key} < {high} ORDER BY {key};')
+    db = get_db()
+    try:
+        with open(path, 'w') as f:
+            count, _ = stream_users(db, batch_size, f, query)
+    finally:
+        db.close()
+    return count
+
+
+def parallel_export(workers: int, key: str = 'id', batch_size: int = 1000,
+                    output_dir: str = None,
+                    stream: TextIO = None) -> Tuple[int, float]:
+    """Export the users table redacted by `workers` processes.
+
+    The table is split into one key range per worker. With `output_dir`
+    each range is left in its own `users.part-NNNN.log` file; otherwise
+    the partitions are written to `stream` in key order as they complete
+    and removed.
+
+    Args:
+        workers (int): number of worker processes.
+        key (str): integer primary-key column used to partition the table.
+        batch_size (int): number of rows fetched and written at a time.
+        output_dir (str): directory for the per-partition files.
+        stream (TextIO): where merged output goes, `sys.stderr` by default.
+    Return:
+        Tuple[int, float]: number of rows exported and seconds taken.
+    """
+    if not key.isidentifier():
+        raise ValueError(f'Invalid key column: {key}')
+    start = time.perf_counter()
+    db = get_db()
+    try:
+        ranges = key_ranges(db, key, workers)
+    finally:
+        db.close()
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    directory = output_dir or tempfile.mkdtemp(prefix='user_data.')
+    tasks = [(key, low, high, batch_size,
+              os.path.join(directory, f'users.part-{i:04d}.log'))
+             for i, (low, high) in enumerate(ranges)]
+    stream = sys.stderr if stream is None else stream
+    count = 0
+    with ProcessPoolExecutor(workers) as pool:
+        for task, rows in zip(tasks, pool.map(export_partition, tasks)):
+            count += rows
+            if output_dir is None:
+                with open(task[-1]) as f:
+                    shutil.copyfileobj(f, stream)
+                os.remove(task[-1])
+    if output_dir is None:
+        stream.flush()
+        shutil.rmtree(directory, ignore_errors=True)
+    return count, time.perf_counter() - start
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse the command line options of `main`."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--stream', action='store_true',
+                        help='export in batches with an unbuffered cursor')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='rows fetched per batch in streaming mode')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='redact key ranges in N worker processes')
+    parser.add_argument('--key', default='id',
+                        help='integer primary key used to split the table')
+    parser.add_argument('--output-dir',
+                        help='write one file per partition instead of '
+                             'merging them in key order')
+    return parser.parse_args(argv)
 
 
 def main() -> None:
     """Retrieve all rows in the users table log to the console."""
+    args = parse_args()
+    if args.workers > 1 or args.stream:
+        if args.workers > 1:
+            count, seconds = parallel_export(args.workers, args.key,
+                                             args.batch_size,
+                                             args.output_dir)
+        else:
+            db = get_db()
+            count, seconds = stream_users(db, args.batch_size)
+            db.close()
+        rate = count / seconds if seconds else float(count)
+        print(f'exported {count} rows in {seconds:.2f}s '
+              f'({rate:.0f} rows/s)')
+        return
     db = get_db()
     logger = get_logger()
     cursor = db.cursor()
     cursor.execute('SELECT * FROM users;')
-    fields = cursor.column_names
+    fields = [desc[0] for desc in cursor.description]
     for row in cursor:
         msg = "".join([f'{key}={val};' for key, val in zip(fields, row)])
         logger.info(msg=msg)
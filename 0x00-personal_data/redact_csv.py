@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Obfuscate the PII columns of CSV dumps like `user_data.csv`.
+
+The file is read in chunks of rows; each chunk is turned into columns and
+every PII column is replaced as a whole, so memory is bounded by the chunk
+size and no row is ever rendered as a `key=value;` log line. The output
+keeps the line endings and quoting of the input.
+"""
+import argparse
+import csv
+import sys
+import time
+from itertools import chain, islice
+from typing import Optional, Sequence, TextIO, Tuple
+
+from filtered_logger import PII_FIELDS
+
+
+def redact_chunk(rows: Sequence[Sequence[str]], pii_columns: Sequence[int],
+                 redaction: str) -> list:
+    """Returns the rows of a chunk with the PII columns obfuscated.
+
+    Args:
+        rows (Sequence[Sequence[str]]): rows of the chunk.
+        pii_columns (Sequence[int]): indexes of the columns to obfuscate.
+        redaction (str): string to obfuscate the columns with.
+    Return:
+        list: redacted rows.
+    """
+    if len(set(map(len, rows))) > 1:
+        wanted = set(pii_columns)
+        return [[redaction if i in wanted else value
+                 for i, value in enumerate(row)] for row in rows]
+    columns = list(zip(*rows))
+    masked = (redaction,) * len(rows)
+    for index in pii_columns:
+        if index < len(columns):
+            columns[index] = masked
+    return list(zip(*columns))
+
+
+QUOTING = {
+    'minimal': csv.QUOTE_MINIMAL,
+    'all': csv.QUOTE_ALL,
+    'nonnumeric': csv.QUOTE_NONNUMERIC,
+}
+
+
+def line_format(line: str) -> Tuple[int, str]:
+    """Returns the quoting and line terminator a CSV line was written with.
+
+    A line starting with a quote is taken as written with every field
+    quoted, any other with quotes only where needed.
+
+    Args:
+        line (str): raw line of the file, with its line ending.
+    Return:
+        Tuple[int, str]: `csv` quoting constant and line terminator.
+    """
+    quoting = csv.QUOTE_ALL if line.startswith('"') else csv.QUOTE_MINIMAL
+    return quoting, '\r\n' if line.endswith('\r\n') else '\n'
+
+
+def redact_csv(src: TextIO, dst: TextIO, fields: Sequence[str] = PII_FIELDS,
+               redaction: str = '***', chunk_size: int = 10000,
+               quoting: Optional[int] = None) -> Tuple[int, float]:
+    """Stream a CSV file to `dst` with the `fields` columns obfuscated.
+
+    The header and the rows are written with the quoting and the line
+    terminator of the first lines of `src`, unless `quoting` is given.
+
+    Args:
+        src (TextIO): CSV file with a header row.
+        dst (TextIO): where the redacted CSV is written.
+        fields (Sequence[str]): names of the columns to obfuscate.
+        redaction (str): string to obfuscate the columns with.
+        chunk_size (int): number of rows held in memory at a time.
+        quoting (Optional[int]): `csv` quoting constant of every line.
+    Return:
+        Tuple[int, float]: number of rows redacted and seconds taken.
+    """
+    start = time.perf_counter()
+    first_lines = [src.readline(), src.readline()]
+    reader = csv.reader(chain(filter(None, first_lines), src))
+    header = next(reader, None)
+    if header is None:
+        return 0, time.perf_counter() - start
+    header_quoting, terminator = line_format(first_lines[0])
+    row_quoting = line_format(first_lines[1])[0]
+    if quoting is not None:
+        header_quoting = row_quoting = quoting
+    csv.writer(dst, quoting=header_quoting,
+               lineterminator=terminator).writerow(header)
+    writer = csv.writer(dst, quoting=row_quoting, lineterminator=terminator)
+    wanted = set(fields)
+    pii_columns = [i for i, name in enumerate(header) if name in wanted]
+    count = 0
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            break
+        writer.writerows(redact_chunk(rows, pii_columns, redaction))
+        count += len(rows)
+    return count, time.perf_counter() - start
+
+
+def main() -> None:
+    """Redact a CSV file and report the throughput on stderr."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('src', help='CSV file to redact')
+    parser.add_argument('dst', nargs='?',
+                        help='redacted CSV file, stdout by default')
+    parser.add_argument('--fields', default=','.join(PII_FIELDS),
+                        help='comma separated columns to obfuscate')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help='rows held in memory at a time')
+    parser.add_argument('--quoting', choices=sorted(QUOTING),
+                        help='quoting of the output, that of the input by '
+                             'default')
+    args = parser.parse_args()
+
+    fields = args.fields.split(',')
+    quoting = QUOTING.get(args.quoting)
+    with open(args.src, newline='') as src:
+        if args.dst is None:
+            count, seconds = redact_csv(src, sys.stdout, fields,
+                                        chunk_size=args.chunk_size,
+                                        quoting=quoting)
+        else:
+            with open(args.dst, 'w', newline='') as dst:
+                count, seconds = redact_csv(src, dst, fields,
+                                            chunk_size=args.chunk_size,
+                                            quoting=quoting)
+    rate = count / seconds if seconds else float(count)
+    print(f'redacted {count} rows in {seconds:.2f}s ({rate:.0f} rows/s)',
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Obfuscate PII in log files that were already written.
+
+The file is memory-mapped and cut into chunks at line boundaries; a pool
+of processes applies the `filter_datum` rules to each chunk and the
+chunks are written back in their original order. Only a bounded number
+of chunks is in flight, so files larger than memory can be scrubbed.
+"""
+import argparse
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Sequence, Tuple
+
+from filtered_logger import PII_FIELDS, RedactingFormatter, get_redactor
+
+
+def chunk_offsets(path: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split a file into `[start, end)` ranges ending on a newline.
+
+    Args:
+        path (str): file to split.
+        chunk_size (int): approximate number of bytes per range.
+    Return:
+        List[Tuple[int, int]]: byte ranges covering the whole file.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    offsets = []
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = mm.find(b'\n', min(start + chunk_size, size) - 1)
+                end = size if end < 0 else end + 1
+                offsets.append((start, end))
+                start = end
+    return offsets
+
+
+def redact_range(task: Tuple[str, int, int, Tuple[str, ...]]) -> bytes:
+    """Returns the redacted bytes of one range of a log file.
+
+    The regex redactor never matches across a newline, so a whole chunk
+    is redacted in one call with the same result as line by line.
+
+    Args:
+        task (Tuple[str, int, int, Tuple[str, ...]]): file path, start
+            and end offsets and the fields to obfuscate.
+    Return:
+        bytes: redacted chunk.
+    """
+    path, start, end, fields = task
+    redactor = get_redactor(fields, RedactingFormatter.REDACTION,
+                            RedactingFormatter.SEPARATOR)
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8', 'surrogateescape')
+    return redactor.redact(text).encode('utf-8', 'surrogateescape')
+
+
+def redact_log_file(src: str, dst: str, fields: Sequence[str] = PII_FIELDS,
+                    workers: int = None,
+                    chunk_size: int = 16 << 20) -> Tuple[int, float]:
+    """Write a redacted copy of the log file `src` to `dst`.
+
+    Args:
+        src (str): log file to scrub.
+        dst (str): where the redacted copy is written.
+        fields (Sequence[str]): fields to obfuscate.
+        workers (int): number of processes, one per CPU by default.
+        chunk_size (int): approximate number of bytes per chunk.
+    Return:
+        Tuple[int, float]: number of bytes read and seconds taken.
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    tasks = [(src, low, high, tuple(fields))
+             for low, high in chunk_offsets(src, chunk_size)]
+    pending = deque()
+    with open(dst, 'wb') as out, ProcessPoolExecutor(workers) as pool:
+        for task in tasks:
+            pending.append(pool.submit(redact_range, task))
+            if len(pending) >= 2 * workers:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+    return os.path.getsize(src), time.perf_counter() - start
+
+
+def main() -> None:
+    """Scrub a log file and report the throughput on stderr."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('src', help='log file to scrub')
+    parser.add_argument('dst', help='redacted copy of the log file')
+    parser.add_argument('--fields', default=','.join(PII_FIELDS),
+                        help='comma separated fields to obfuscate')
+    parser.add_argument('--workers', type=int,
+                        help='worker processes, one per CPU by default')
+    parser.add_argument('--chunk-size', type=int, default=16,
+                        help='approximate chunk size in MiB')
+    args = parser.parse_args()
+
+    size, seconds = redact_log_file(args.src, args.dst,
+                                    args.fields.split(','), args.workers,
+                                    args.chunk_size << 20)
+    rate = size / seconds / (1 << 20) if seconds else 0.0
+    print(f'redacted {size} bytes in {seconds:.2f}s ({rate:.1f} MiB/s)',
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
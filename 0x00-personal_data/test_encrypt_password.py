@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Unit tests of encrypt_password.
+
+Run from this directory: python3 -m unittest test_encrypt_password
+"""
+import unittest
+from unittest import mock
+
+import encrypt_password
+from encrypt_password import (MIN_BCRYPT_COST, calibrate_cost,
+                              hash_password, set_bcrypt_cost,
+                              verify_and_upgrade)
+
+
+class TestCost(unittest.TestCase):
+    """Tests of the bcrypt cost calibration and upgrades."""
+
+    def setUp(self):
+        """Remember the current cost."""
+        self.cost = encrypt_password._bcrypt_cost
+
+    def tearDown(self):
+        """Put the current cost back."""
+        set_bcrypt_cost(self.cost)
+
+    def test_calibration_floor(self):
+        """A tiny budget still gives the minimum cost."""
+        self.assertGreaterEqual(MIN_BCRYPT_COST, 10)
+        self.assertEqual(calibrate_cost(0.001), MIN_BCRYPT_COST)
+
+    def test_upgrade_only(self):
+        """A lower cost is rehashed, a higher one is kept by default."""
+        set_bcrypt_cost(4)
+        low = hash_password('pwd')
+        set_bcrypt_cost(5)
+        valid, new = verify_and_upgrade(low, 'pwd')
+        self.assertTrue(valid)
+        self.assertTrue(new.startswith(b'$2b$05$'))
+        set_bcrypt_cost(4)
+        self.assertEqual(verify_and_upgrade(new, 'pwd'), (True, None))
+        with mock.patch.object(encrypt_password, 'ALLOW_COST_DOWNGRADE',
+                               True):
+            valid, down = verify_and_upgrade(new, 'pwd')
+        self.assertTrue(down.startswith(b'$2b$04$'))
+        self.assertEqual(verify_and_upgrade(low, 'bad'), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Unit tests of filtered_logger.
+
+Run from this directory: python3 -m unittest test_filtered_logger
+"""
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from filtered_logger import (PII_FIELDS, ConnectionPool, RedactingFormatter,
+                             _mysql_recycle, filter_datum, get_db_pool,
+                             get_redactor)
+
+
+MIXED_LINES = (
+    'name=bob;email=bob@x.com;phone=555;ssn=123;password=pwd;ip=1.2.3.4;',
+    'action=login email=bob@x.com;',
+    'id=1,email=bob@x.com;',
+    'user email=bob@x.com,name=bob;last_login=2019-11-14 06:14:24;',
+    'myname=bob;ip=1.2.3.4;',
+    'note=a=b;password=x=y;',
+    'no pairs at all;',
+    ';;email=;name;=ssn;',
+    'ip=1.2.3.4;',
+    '',
+)
+
+
+class TestTokenRedactor(unittest.TestCase):
+    """Tests of the `token` redaction mode."""
+
+    def setUp(self):
+        """Get the token redactor of the PII fields."""
+        self.redactor = get_redactor(PII_FIELDS, '***', ';', 'token')
+
+    def test_matches_filter_datum(self):
+        """Lines closed by the separator are redacted like the regex path."""
+        for line in MIXED_LINES:
+            with self.subTest(line=line):
+                self.assertEqual(
+                    self.redactor.redact(line),
+                    filter_datum(list(PII_FIELDS), '***', line, ';'))
+
+    def test_key_after_another_pair(self):
+        """A field following another pair in the same token is redacted."""
+        self.assertEqual(self.redactor.redact('id=1,email=bob@x.com;'),
+                         'id=1,email=***;')
+        self.assertEqual(
+            self.redactor.redact('action=login email=bob@x.com;'),
+            'action=login email=***;')
+
+    def test_trailing_value(self):
+        """A value with no closing separator is redacted too."""
+        self.assertEqual(self.redactor.redact('ip=1;ssn=123'),
+                         'ip=1;ssn=***')
+
+
+class TestStructuredFormatter(unittest.TestCase):
+    """Tests of the structured mode of `RedactingFormatter`."""
+
+    def setUp(self):
+        """Get a structured formatter of the PII fields."""
+        self.formatter = RedactingFormatter(PII_FIELDS, structured=True)
+
+    def record(self, msg, args=(), **extra) -> logging.LogRecord:
+        """Build an INFO record of the `user_data` logger."""
+        record = logging.LogRecord('user_data', logging.INFO, __file__, 0,
+                                   msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_mapping_message(self):
+        """A mapping message is rendered with its fields redacted."""
+        row = {'name': 'bob', 'ip': '1.2.3.4'}
+        record = self.record(row)
+        line = self.formatter.format(record)
+        self.assertTrue(line.endswith(': name=***;ip=1.2.3.4;'))
+        self.assertIs(record.msg, row)
+
+    def test_mapping_args(self):
+        """Mapping arguments are redacted before interpolation."""
+        args = {'email': 'bob@x.com', 'ip': '1.2.3.4'}
+        record = self.record('email=%(email)s;ip=%(ip)s;', (args,))
+        line = self.formatter.format(record)
+        self.assertTrue(line.endswith(': email=***;ip=1.2.3.4;'))
+        self.assertEqual(record.args, args)
+
+    def test_extra_fields(self):
+        """Extra attributes named after a field are redacted, then put
+        back on the record."""
+        class SSNFormatter(RedactingFormatter):
+            FORMAT = '%(ssn)s %(message)s'
+
+        formatter = SSNFormatter(PII_FIELDS, structured=True)
+        record = self.record({'ip': '1.2.3.4'}, ssn='123')
+        self.assertEqual(formatter.format(record), '*** ip=1.2.3.4;')
+        self.assertEqual(record.ssn, '123')
+
+    def test_traceback_and_stack(self):
+        """The traceback and stack of a structured record are redacted."""
+        try:
+            raise ValueError('bad row email=bob@x.com;')
+        except ValueError:
+            record = logging.LogRecord(
+                'user_data', logging.INFO, __file__, 0, {'name': 'bob'}, (),
+                sys.exc_info(), sinfo='Stack (most recent call last):\n'
+                                      '  ssn=123-45-6789;')
+        for formatter in (self.formatter, RedactingFormatter(PII_FIELDS)):
+            with self.subTest(structured=formatter.structured):
+                line = formatter.format(record)
+                self.assertIn('email=***;', line)
+                self.assertIn('ssn=***;', line)
+                self.assertNotIn('bob@x.com', line)
+                self.assertNotIn('123-45-6789', line)
+
+    def test_cached_traceback(self):
+        """A traceback cached on the record by another formatter is
+        redacted too, and left as it was on the record."""
+        record = self.record({'name': 'bob'})
+        record.exc_text = 'ValueError: email=bob@x.com;'
+        line = self.formatter.format(record)
+        self.assertTrue(line.endswith('ValueError: email=***;'))
+        self.assertEqual(record.exc_text, 'ValueError: email=bob@x.com;')
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests of the connections given back to `ConnectionPool`."""
+
+    def test_sqlite_rolls_back(self):
+        """An open transaction is rolled back before reuse."""
+        path = os.path.join(tempfile.mkdtemp(), 'users.db')
+        with sqlite3.connect(path) as db:
+            db.execute('CREATE TABLE users (email TEXT)')
+        env = {'PERSONAL_DATA_DB_BACKEND': 'sqlite',
+               'PERSONAL_DATA_DB_NAME': path}
+        with mock.patch.dict(os.environ, env):
+            get_db_pool.cache_clear()
+            pool = get_db_pool()
+        get_db_pool.cache_clear()
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO users VALUES ('bob@x.com')")
+            self.assertTrue(conn.in_transaction)
+        with pool.connection() as again:
+            self.assertIs(again, conn)
+            self.assertFalse(again.in_transaction)
+            self.assertEqual(
+                again.execute('SELECT COUNT(*) FROM users').fetchone(),
+                (0,))
+        pool.close()
+
+    def test_mysql_gives_connection_back(self):
+        """A MySQL connection goes back to its own pool, results read."""
+        conn = mock.Mock(unread_result=True)
+        pool = ConnectionPool(lambda: conn, 1, recycle=_mysql_recycle)
+        with pool.connection():
+            pass
+        conn.consume_results.assert_called_once_with()
+        conn.close.assert_called_once_with()
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
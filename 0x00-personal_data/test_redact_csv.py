@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Unit tests of redact_csv.
+
+Run from this directory: python3 -m unittest test_redact_csv
+"""
+import csv
+import io
+import os
+import unittest
+
+from redact_csv import redact_csv
+
+
+class TestRedactCsv(unittest.TestCase):
+    """Tests of the format of the redacted CSV."""
+
+    def redact(self, text: str, **kwargs) -> str:
+        """Returns the redacted form of a CSV text."""
+        dst = io.StringIO(newline='')
+        redact_csv(io.StringIO(text, newline=''), dst, **kwargs)
+        return dst.getvalue()
+
+    def test_user_data_format(self):
+        """A dump like user_data.csv keeps its quoting and line endings."""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'user_data.csv')
+        with open(path, newline='') as f:
+            text = f.read()
+        lines = self.redact(text).splitlines(True)
+        source = text.splitlines(True)
+        self.assertEqual(len(lines), len(source))
+        self.assertEqual(lines[0], source[0])
+        for line, original in zip(lines[1:], source[1:]):
+            self.assertTrue(line.startswith('"***",' * 5))
+            self.assertTrue(line.endswith('"\n'))
+            self.assertEqual(line.split('","', 5)[5].rstrip('\n'),
+                             original.split('","', 5)[5].rstrip('\n'))
+
+    def test_crlf_minimal(self):
+        """A CRLF file quoted where needed is written back the same way."""
+        text = 'name,ip\r\nbob,"1,2"\r\nal,3\r\n'
+        self.assertEqual(self.redact(text),
+                         'name,ip\r\n***,"1,2"\r\n***,3\r\n')
+
+    def test_quoting_option(self):
+        """An explicit quoting applies to the header and the rows."""
+        text = 'name,ip\nbob,1\n'
+        self.assertEqual(self.redact(text, quoting=csv.QUOTE_ALL),
+                         '"name","ip"\n"***","1"\n')
+
+    def test_empty(self):
+        """An empty file gives an empty output."""
+        self.assertEqual(self.redact(''), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,12 +10,46 @@ import uuid
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+
+
+def _index_add(obj: TypeVar('Base'), attrs: Iterable[str] = None):
+    """ Add a stored object to the secondary indexes of its class
+    """
+    s_class = obj.__class__.__name__
+    indexes = INDEXES.setdefault(s_class, {})
+    for attr in obj.indexes if attrs is None else attrs:
+        value = getattr(obj, attr, None)
+        try:
+            indexes.setdefault(attr, {}).setdefault(value, {})[obj.id] = obj
+        except TypeError:
+            continue
+
+
+def _index_remove(obj: TypeVar('Base'), attrs: Iterable[str] = None):
+    """ Remove a stored object from the secondary indexes of its class
+    """
+    indexes = INDEXES.get(obj.__class__.__name__, {})
+    for attr in obj.indexes if attrs is None else attrs:
+        try:
+            bucket = indexes.get(attr, {}).get(getattr(obj, attr, None))
+        except TypeError:
+            continue
+        if bucket is not None and bucket.get(obj.id) is obj:
+            del bucket[obj.id]
+            if not bucket:
+                del indexes[attr][getattr(obj, attr, None)]
 
 
 class Base():
     """ Base class
+
+    Subclasses list in `indexes` the attributes `search` should find
+    through a dictionary lookup instead of a scan of every object.
     """
 
+    indexes = ()
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
@@ -35,6 +69,22 @@ class Base():
         else:
             self.updated_at = datetime.utcnow()
 
+    def __setattr__(self, name: str, value):
+        """ Set an attribute, keeping the indexes of stored objects in sync
+        """
+        if name not in self.indexes or not self._is_stored():
+            super().__setattr__(name, value)
+            return
+        _index_remove(self, (name,))
+        super().__setattr__(name, value)
+        _index_add(self, (name,))
+
+    def _is_stored(self) -> bool:
+        """ Whether this very instance is the one kept in DATA
+        """
+        objs = DATA.get(self.__class__.__name__, {})
+        return objs.get(getattr(self, 'id', None)) is self
+
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
         """
@@ -64,6 +114,7 @@ class Base():
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
         DATA[s_class] = {}
+        INDEXES[s_class] = {}
         if not path.exists(file_path):
             return
 
@@ -71,6 +122,8 @@ class Base():
             objs_json = json.load(f)
             for obj_id, obj_json in objs_json.items():
                 DATA[s_class][obj_id] = cls(**obj_json)
+        for obj in DATA[s_class].values():
+            _index_add(obj)
 
     @classmethod
     def save_to_file(cls):
@@ -90,14 +143,20 @@ class Base():
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
+        old = DATA[s_class].get(self.id)
+        if old is not None:
+            _index_remove(old)
         DATA[s_class][self.id] = self
+        _index_add(self)
         self.__class__.save_to_file()
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        obj = DATA[s_class].get(self.id)
+        if obj is not None:
+            _index_remove(obj)
             del DATA[s_class][self.id]
             self.__class__.save_to_file()
 
@@ -124,6 +183,9 @@ class Base():
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        Objects are looked up through the index of the first indexed
+        attribute searched on, if any, and checked on the others.
         """
         s_class = cls.__name__
         def _search(obj):
@@ -133,5 +195,14 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        objs = DATA[s_class].values()
+        indexes = INDEXES.get(s_class, {})
+        for k in cls.indexes:
+            if k in attributes:
+                try:
+                    objs = indexes.get(k, {}).get(attributes[k], {}).values()
+                except TypeError:
+                    continue
+                break
+        return list(filter(_search, objs))
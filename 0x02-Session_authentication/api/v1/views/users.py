@@ -2,18 +2,99 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import Response, abort, jsonify, request
 from models.user import User
+from typing import Iterable, Iterator, Tuple
+import base64
+import binascii
+import json
+import urllib.parse
+
+
+PAGE_LIMIT_MAX = 1000
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """ Opaque cursor for the (created_at, id) key of a user
+    """
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """ Key of the user a cursor points to, ValueError if malformed
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("invalid cursor")
+    if (type(key) is not list or len(key) != 2
+            or not all(type(part) is str for part in key)):
+        raise ValueError("invalid cursor")
+    return tuple(key)
+
+
+def stream_users(users: Iterable[User]) -> Iterator[str]:
+    """ JSON array of users, written a few users at a time
+    """
+    yield '['
+    separator = ''
+    batch = []
+    for user in users:
+        batch.append(user.json_fragment())
+        if len(batch) == 100:
+            yield separator + ','.join(batch)
+            separator, batch = ',', []
+    if batch:
+        yield separator + ','.join(batch)
+    yield ']'
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - limit (optional): page size, keyset pagination by creation date
+      - cursor (optional): value of the next link of the previous page
+      - stream (optional): 1 to write the array incrementally
     Return:
-      - list of all User objects JSON represented
+      - list of all User objects JSON represented, or one page of them
+        with a `Link` header to the next page
+      - 400 if the limit or the cursor are invalid
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    streamed = request.args.get('stream') == '1'
+    next_key = None
+    if limit is None and cursor is None:
+        users = User.all()
+    else:
+        limit_error = "limit must be in 1..{}".format(PAGE_LIMIT_MAX)
+        try:
+            limit = int(PAGE_LIMIT_MAX if limit is None else limit)
+        except ValueError:
+            return jsonify({'error': limit_error}), 400
+        if not 0 < limit <= PAGE_LIMIT_MAX:
+            return jsonify({'error': limit_error}), 400
+        try:
+            after = None if cursor is None else decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        users, next_key = User.page(limit, after)
+
+    if streamed:
+        response = Response(stream_users(users),
+                            mimetype='application/json')
+    else:
+        all_users = ','.join(user.json_fragment() for user in users)
+        response = Response('[' + all_users + ']',
+                            mimetype='application/json')
+    if next_key is not None:
+        params = {'limit': limit, 'cursor': encode_cursor(next_key)}
+        if streamed:
+            params['stream'] = 1
+        response.headers['Link'] = '<{}?{}>; rel="next"'.format(
+            request.base_url, urllib.parse.urlencode(params))
+    return response
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Benchmark the JSON store (in journal mode) against the SQLite backend
+(STORE_BACKEND=sqlite): inserts, reload, lookups by id and by indexed
+email, search on a non indexed attribute, count and a page of 100
+
+Run from this directory: ./bench_backends.py [COUNT]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def timed(label: str, count: int, func):
+    """ Print the time per operation of `count` calls of `func`
+    """
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print("  {:<18} {:10.1f} us/op".format(label, elapsed / count * 1e6))
+
+
+def measure(count: int):
+    """ Run every operation against the backend picked by the environment
+    """
+    from models.base import DATA
+    from models.user import User
+
+    users = []
+
+    def insert(i):
+        user = User(email="user{}@holberton.io".format(i),
+                    first_name="Bob", last_name="Dylan{}".format(i % 100))
+        user.save()
+        users.append(user.id)
+
+    timed("save (insert)", count, insert)
+    DATA.clear()
+    timed("load_from_file", 1, lambda i: User.load_from_file())
+    timed("get by id", 1000, lambda i: User.get(users[i * 7 % count]))
+    timed("search email", 1000, lambda i: User.search(
+        {"email": "user{}@holberton.io".format(i * 7 % count)}))
+    timed("search last_name", 10, lambda i: User.search(
+        {"last_name": "Dylan{}".format(i)}))
+    timed("count", 1000, lambda i: User.count())
+    timed("page of 100", 100, lambda i: User.page(100))
+
+
+def main():
+    """ Measure each backend in its own interpreter and directory
+    """
+    count = sys.argv[1] if len(sys.argv) > 1 else "20000"
+    if os.getenv("BENCH_CHILD"):
+        measure(int(count))
+        return
+    here = os.path.dirname(os.path.abspath(__file__))
+    for backend in ("json", "sqlite"):
+        print("STORE_BACKEND={} ({} users)".format(backend, count),
+              flush=True)
+        env = dict(os.environ, BENCH_CHILD="1", STORE_BACKEND=backend,
+                   STORE_MODE="journal", PYTHONPATH=here)
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.run([sys.executable, os.path.abspath(__file__),
+                            count], env=env, cwd=tmp, check=True)
+
+
+if __name__ == "__main__":
+    main()
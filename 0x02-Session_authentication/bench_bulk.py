@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+""" Benchmark importing users one `save` at a time against the bulk
+import of models.bulk, which writes the snapshot once, and the NDJSON
+export of the store
+
+Run from this directory: ./bench_bulk.py [COUNT]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from models import bulk
+from models.base import DATA
+from models.user import User
+
+
+def ndjson(count: int) -> str:
+    """ NDJSON of `count` users with plaintext passwords
+    """
+    return ''.join(json.dumps({"email": "user{}@holberton.io".format(i),
+                               "password": "H0lberton{}".format(i),
+                               "first_name": "Bob", "last_name": "Dylan"})
+                   + '\n' for i in range(count))
+
+
+def report(label: str, count: int, seconds: float):
+    """ Print the records per second of a run
+    """
+    print("{:<28} {:>8} records {:8.2f} s {:>10.0f} records/s".format(
+        label, count, seconds, count / seconds))
+
+
+def main():
+    """ Time one save per user, the bulk import and the export
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.chdir(tempfile.mkdtemp())
+
+    small = min(count, 2000)
+    DATA["User"] = {}
+    start = time.perf_counter()
+    for record in bulk.read_records(io.StringIO(ndjson(small))):
+        user = User(**record)
+        user.password = record["password"]
+        user.save()
+    report("save() per user", small, time.perf_counter() - start)
+
+    for size in (small, count):
+        for workers in (1, 2):
+            DATA["User"] = {}
+            imported, seconds = bulk.import_records(
+                User, io.StringIO(ndjson(size)), workers=workers)
+            report("bulk import, {} worker(s)".format(workers), imported,
+                   seconds)
+
+    with open(os.devnull, "w") as f:
+        exported, seconds = bulk.export_records(User, f)
+    report("NDJSON export", exported, seconds)
+
+
+if __name__ == "__main__":
+    main()
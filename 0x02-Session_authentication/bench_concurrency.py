@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+""" Stress the JSON store from many threads, then check that nothing
+was lost or torn, and measure the read throughput of indexed searches
+for a growing number of reader threads next to one writer
+
+Run from this directory: ./bench_concurrency.py [SECONDS]
+The store runs in journal mode in a temporary directory unless
+STORE_MODE says otherwise.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("STORE_MODE", "journal")
+from models.base import DATA, INDEXES, flush  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def run_threads(targets, seconds: float) -> list:
+    """ Run each target in its own thread until `seconds` have passed
+    and return the exceptions they raised
+    """
+    stop = threading.Event()
+    errors = []
+
+    def loop(target, n):
+        try:
+            i = 0
+            while not stop.is_set():
+                target(n, i)
+                i += 1
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=loop, args=(target, n))
+               for n, target in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def writer(n: int, i: int):
+    """ Create, update and remove users
+    """
+    user = User(email="w{}-{}@holberton.io".format(n, i))
+    user.password = "pwd"
+    user.save()
+    user.first_name = "Bob"
+    user.save()
+    if i % 3 == 0:
+        user.remove()
+
+
+def reader(n: int, i: int):
+    """ Search, list and page through the users
+    """
+    User.search({"email": "w0-{}@holberton.io".format(i)})
+    if i % 50 == 0:
+        User.all()
+        User.page(100)
+        User.count()
+
+
+def check():
+    """ Compare the store with what is on file and with its indexes
+    """
+    flush()
+    expected = {user.id: user.email for user in User.all()}
+    for user_id, email in expected.items():
+        found = [user.id for user in User.search({"email": email})]
+        assert found == [user_id], (email, found)
+    for email, bucket in INDEXES["User"]["email"].items():
+        assert all(expected.get(user_id) == email for user_id in bucket)
+    User.save_to_file()
+    User.load_from_file()
+    assert {user.id: user.email for user in User.all()} == expected
+    return len(expected)
+
+
+def main():
+    """ Stress the store, check it, then time the readers
+    """
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    os.chdir(tempfile.mkdtemp())
+    User.load_from_file()
+
+    errors = run_threads([writer] * 4 + [reader] * 8, seconds)
+    assert not errors, errors
+    print("stress: 4 writers, 8 readers, {:.0f}s, {} users left, "
+          "consistent".format(seconds, check()))
+
+    for count in range(200):
+        writer(99, count)
+    for readers in (1, 2, 4, 8):
+        searches = [0] * readers
+
+        def count_search(n, i):
+            User.search({"email": "w99-{}@holberton.io".format(i % 200)})
+            searches[n] += 1
+
+        def slow_writer(n, i):
+            writer(98, i)
+            time.sleep(0.01)
+
+        errors = run_threads([count_search] * readers + [slow_writer],
+                             seconds)
+        assert not errors, errors
+        print("{} readers + 1 writer: {:8.0f} searches/s".format(
+            readers, sum(searches) / seconds))
+
+
+if __name__ == "__main__":
+    main()
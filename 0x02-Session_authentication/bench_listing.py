@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+""" Benchmark the listing of every User as done by GET /api/v1/users:
+building and encoding fresh dictionaries against joining the memoized
+JSON fragments of the users
+
+Run from this directory: ./bench_listing.py [COUNT]
+"""
+import sys
+import time
+
+from flask import jsonify
+
+from api.v1.app import app
+from api.v1.views.users import view_all_users
+from models.base import DATA
+from models.user import User
+
+
+def timed(label: str, func):
+    """ Print the time taken by `func` and return its response
+    """
+    start = time.perf_counter()
+    response = func()
+    print("{:<22} {:8.1f} ms".format(label,
+                                     (time.perf_counter() - start) * 1000))
+    return response
+
+
+def main():
+    """ List the users uncached, then with cold and warm fragments
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    DATA["User"] = {}
+    for i in range(count):
+        user = User(email="user{}@holberton.io".format(i),
+                    first_name="Bob", last_name="Dylan")
+        user.password = "H0lberton"
+        DATA["User"][user.id] = user
+
+    with app.test_request_context('/api/v1/users'):
+        fresh = timed("fresh dicts (jsonify)", lambda: jsonify(
+            [user._build_json(False) for user in User.all()]))
+        timed("fragments, cold", view_all_users)
+        cached = timed("fragments, warm", view_all_users)
+    assert fresh.get_json() == cached.get_json()
+    print("{} users, {} bytes".format(count, len(cached.get_data())))
+
+
+if __name__ == "__main__":
+    main()
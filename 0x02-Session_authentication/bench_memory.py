@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" Benchmark the memory held per User in DATA, with regular and
+compact (STORE_COMPACT=1) models, using tracemalloc
+
+The users are measured as built, then after a snapshot save and a
+listing of their JSON fragments, which leave cached JSON behind.
+
+Run from this directory: ./bench_memory.py [COUNT]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+
+def measure(count: int):
+    """ Print the bytes allocated per user stored in DATA, as built
+    and after a save and a listing
+    """
+    from models.base import DATA
+    from models.user import User
+
+    tracemalloc.start()
+    DATA["User"] = {}
+    for i in range(count):
+        user = User(email="user{}@holberton.io".format(i),
+                    first_name="Bob", last_name="Dylan",
+                    created_at="2017-09-25T01:55:17",
+                    updated_at="2017-09-25T01:55:17")
+        user.password = "H0lberton"
+        DATA["User"][user.id] = user
+    built, _ = tracemalloc.get_traced_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            User.save_to_file()
+        finally:
+            os.chdir(cwd)
+    listing = ','.join(user.json_fragment() for user in User.all())
+    del listing
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:>8} users: {:6.0f} bytes/user, {:6.0f} after a save and a "
+          "listing".format(count, built / count, used / count))
+
+
+def main():
+    """ Measure each representation in its own interpreter
+    """
+    count = sys.argv[1] if len(sys.argv) > 1 else "100000"
+    if os.getenv("BENCH_CHILD"):
+        measure(int(count))
+        return
+    for compact in ("0", "1"):
+        print("STORE_COMPACT={}".format(compact), end=": ", flush=True)
+        env = dict(os.environ, BENCH_CHILD="1", STORE_COMPACT=compact)
+        subprocess.run([sys.executable, __file__, count], env=env,
+                       check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+""" Benchmark GET /api/v1/users on stores of growing size: the full
+listing against one page fetched with `limit` and `cursor`, whose cost
+should only depend on the page size (JSON fragments already cached)
+
+Run from this directory: ./bench_pagination.py [LIMIT]
+"""
+import sys
+import time
+
+import api.v1.app
+from api.v1.app import app
+from models.base import DATA, ORDERED
+from models.user import User
+
+
+def timed(client, url: str):
+    """ Return the milliseconds taken by a GET and its response
+    """
+    start = time.perf_counter()
+    response = client.get(url)
+    response.get_data()
+    return (time.perf_counter() - start) * 1000, response
+
+
+def main():
+    """ Time the full listing and a page in the middle of the store
+    """
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    api.v1.app.auth = None
+    client = app.test_client()
+    for count in (10000, 100000, 300000):
+        DATA["User"] = {}
+        ORDERED.pop("User", None)
+        for i in range(count):
+            user = User(email="user{}@holberton.io".format(i))
+            DATA["User"][user.id] = user
+        client.get('/api/v1/users').get_data()
+        full, _ = timed(client, '/api/v1/users')
+        streamed, _ = timed(client, '/api/v1/users?stream=1')
+        url = '/api/v1/users?limit={}'.format(limit)
+        for _ in range(count // limit // 2):
+            _, response = timed(client, url)
+            url = response.headers['Link'][1:].split('>')[0]
+        page, _ = timed(client, url)
+        print("{:>7} users: full {:8.1f} ms, streamed {:8.1f} ms, "
+              "page of {} {:6.2f} ms".format(count, full, streamed, limit,
+                                             page))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+""" Benchmark Base.query against filtering `all()` in Python, on one
+million users kept in memory with compact models
+
+Run from this directory: ./bench_query.py [COUNT]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("STORE_COMPACT", "1")
+from models.base import DATA, _index_add, _indexed_values  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def timed(label: str, func):
+    """ Print the time taken by `func` and the number of results
+    """
+    start = time.perf_counter()
+    found = func()
+    print("  {:<14} {:9.2f} ms  {} results".format(
+        label, (time.perf_counter() - start) * 1000, len(found)))
+
+
+def main():
+    """ Time a few admin queries both ways
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    start = datetime(2024, 1, 1)
+    last_names = ("Dylan", "Baez", "Cash", "Mitchell", "Simon")
+    DATA["User"] = {}
+    for i in range(count):
+        user = User(email="user{:07d}@holberton.io".format(i),
+                    first_name="Bob", last_name=last_names[i % 5],
+                    created_at=(start + timedelta(seconds=i)).isoformat())
+        DATA["User"][user.id] = user
+        _index_add("User", user.id, _indexed_values(user))
+    cutoff = start + timedelta(seconds=count // 100)
+    print("first use of the sorted indexes ({} users)".format(count))
+    timed("creation order", lambda: list(User.query(
+        order_by="created_at", limit=1)))
+    timed("email values", lambda: list(User.query(
+        email__startswith="user0000000")))
+
+    queries = [
+        ("created before T",
+         lambda: list(User.query(created_at__lt=cutoff)),
+         lambda: [u for u in User.all() if u.created_at < cutoff]),
+        ("last_name, created_at, first 50",
+         lambda: list(User.query(last_name="Cash", order_by="created_at",
+                                 limit=50)),
+         lambda: sorted((u for u in User.all() if u.last_name == "Cash"),
+                        key=lambda u: (u.created_at, u.id))[:50]),
+        ("email prefix, first 50",
+         lambda: list(User.query(email__startswith="user00123",
+                                 limit=50)),
+         lambda: [u for u in User.all()
+                  if u.email.startswith("user00123")][:50]),
+        ("newest 50",
+         lambda: list(User.query(order_by="-created_at", limit=50)),
+         lambda: sorted(User.all(), key=lambda u: (u.created_at, u.id),
+                        reverse=True)[:50]),
+    ]
+    for name, fast, slow in queries:
+        print("{} ({} users)".format(name, count))
+        timed("query", fast)
+        timed("all + filter", slow)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" Benchmark the JSON and binary snapshot formats: file size, time of
+User.save_to_file and time of User.load_from_file (lazy, so the time
+is the one of reading the file and indexing the records, not of
+building every object)
+
+Run from this directory: ./bench_snapshot.py [COUNT ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+FORMATS = (("json", "none"), ("binary", "none"), ("binary", "zlib"),
+           ("binary", "lzma"))
+
+
+def measure(count: int):
+    """ Save and load `count` users in the format of the environment
+    """
+    from models.base import DATA, _snapshot_path
+    from models.user import User
+
+    DATA["User"] = {}
+    for i in range(count):
+        user = User(email="user{:07d}@holberton.io".format(i),
+                    first_name="Bob", last_name="Dylan",
+                    created_at="2024-01-01T00:00:00",
+                    updated_at="2024-01-01T00:00:00")
+        user._password = "$2b$12$" + "x" * 53
+        DATA["User"][user.id] = user
+
+    start = time.perf_counter()
+    User.save_to_file()
+    save = time.perf_counter() - start
+    DATA.clear()
+    start = time.perf_counter()
+    User.load_from_file()
+    load = time.perf_counter() - start
+    assert User.count() == count
+    size = os.path.getsize(_snapshot_path("User"))
+    print("{:>10.1f} MB {:8.2f} s save {:8.2f} s load".format(
+        size / 1e6, save, load))
+
+
+def main():
+    """ Measure each format in its own interpreter and directory
+    """
+    if os.getenv("BENCH_CHILD"):
+        measure(int(sys.argv[1]))
+        return
+    here = os.path.dirname(os.path.abspath(__file__))
+    for count in sys.argv[1:] or ("100000", "1000000"):
+        for snapshot_format, compress in FORMATS:
+            print("{:>8} users {:>6} {:<5}".format(
+                count, snapshot_format, compress), end="", flush=True)
+            env = dict(os.environ, BENCH_CHILD="1", PYTHONPATH=here,
+                       STORE_SNAPSHOT_FORMAT=snapshot_format,
+                       STORE_COMPRESS=compress, STORE_LAZY_LOAD="1",
+                       STORE_COMPACT="1")
+            with tempfile.TemporaryDirectory() as tmp:
+                subprocess.run([sys.executable, os.path.abspath(__file__),
+                                count], env=env, cwd=tmp, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" Benchmark User.load_from_file() with eager and lazy hydration
+
+Run from this directory: ./bench_startup.py [COUNT ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import models.base
+from models.user import User
+
+
+def generate(count: int):
+    """ Write a .db_User.json snapshot holding `count` users
+    """
+    objs_json = {}
+    for i in range(count):
+        obj_id = str(uuid.uuid4())
+        objs_json[obj_id] = {
+            "id": obj_id,
+            "created_at": "2017-09-25T01:55:17",
+            "updated_at": "2017-09-25T01:55:17",
+            "email": "user{}@holberton.io".format(i),
+            "_password": "5e884898da28047151d0e56f8dc6292773603d0d6aab"
+                         "bdd62a11ef721d1542d8",
+            "first_name": "Bob",
+            "last_name": "Dylan",
+        }
+    with open(".db_User.json", "w") as f:
+        json.dump(objs_json, f)
+
+
+def run(counts):
+    """ Print the load time of each mode for each store size
+    """
+    for count in counts:
+        generate(count)
+        results = []
+        for lazy in (False, True):
+            models.base.LAZY_LOAD = lazy
+            start = time.perf_counter()
+            User.load_from_file()
+            elapsed = time.perf_counter() - start
+            results.append("{} {:8.3f} s".format(
+                "lazy" if lazy else "eager", elapsed))
+            models.base.DATA["User"] = {}
+        print("{:>8} users: {}".format(count, "  ".join(results)))
+
+
+def main():
+    """ Run the benchmark in a scratch directory
+    """
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    with tempfile.TemporaryDirectory(prefix="bench_startup.") as directory:
+        os.chdir(directory)
+        run(counts)
+
+
+if __name__ == "__main__":
+    main()
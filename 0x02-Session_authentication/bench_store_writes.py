@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+""" Benchmark the latency of User.save() as the store grows,
+with full snapshot rewrites and with the append-only journal
+
+Run from this directory: ./bench_store_writes.py
+"""
+import os
+import tempfile
+import time
+
+import models.base
+from models.base import DATA
+from models.user import User
+
+
+def populate(count: int):
+    """ Fill the User store with `count` users and snapshot it
+    """
+    User.load_from_file()
+    for i in range(count):
+        user = User(email="user{}@holberton.io".format(i))
+        DATA["User"][user.id] = user
+    User.save_to_file()
+
+
+def main():
+    """ Run the benchmark in a scratch directory
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_store.") as directory:
+        os.chdir(directory)
+        run()
+
+
+def run():
+    """ Print the update latency for each mode and store size
+    """
+    for count in (1000, 10000, 100000):
+        results = []
+        for mode in ("snapshot", "journal"):
+            models.base.STORE_MODE = mode
+            populate(count)
+            user = next(iter(DATA["User"].values()))
+            start = time.perf_counter()
+            for i in range(20):
+                user.first_name = str(i)
+                user.save()
+            elapsed = (time.perf_counter() - start) / 20
+            results.append("{} {:9.3f} ms".format(mode, elapsed * 1000))
+        print("{:>6} users: {}".format(count, "  ".join(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,385 @@
 #!/usr/bin/env python3
 """ Base module
 """
-from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import (TypeVar, Callable, List, Iterable, Iterator, Optional,
+                    Tuple)
+from os import getenv, path
+from models import journal, query, snapshot
+from models.lazy import LazyObjects
+from models.rwlock import RWLock
+from models.sqlite_store import SQLiteStore
+from models.write_behind import WriteBehind
+import fcntl
+import heapq
+import itertools
 import json
+import os
+import tempfile
+import threading
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+VALUES = {}
+ORDERED = {}
+LOCKS = {}
+STORE_MODE = getenv("STORE_MODE", "snapshot")
+COMPACT_EVERY = int(getenv("STORE_COMPACT_EVERY", 1000))
+JOURNAL_SIZES = {}
+LAZY_LOAD = getenv("STORE_LAZY_LOAD", "0") == "1"
+COMPACT = getenv("STORE_COMPACT", "0") == "1"
+JSON_CACHE = "_json_cache"
+EPOCH = datetime(1970, 1, 1)
+FLUSH_INTERVAL = float(getenv("STORE_FLUSH_INTERVAL", 0))
+WRITE_BEHIND = None
+if FLUSH_INTERVAL > 0:
+    WRITE_BEHIND = WriteBehind(FLUSH_INTERVAL,
+                               int(getenv("STORE_FLUSH_CHANGES", 100)))
+BACKENDS = {
+    'sqlite': lambda: SQLiteStore(getenv("STORE_SQLITE_PATH",
+                                         ".db.sqlite3")),
+}
+STORE_BACKEND = getenv("STORE_BACKEND", "json")
+if STORE_BACKEND != "json" and STORE_BACKEND not in BACKENDS:
+    raise ValueError("unknown STORE_BACKEND: {}".format(STORE_BACKEND))
+BACKEND = BACKENDS[STORE_BACKEND]() if STORE_BACKEND != "json" else None
+MULTIPROCESS = getenv("STORE_MULTIPROCESS", "0") == "1"
+if MULTIPROCESS and WRITE_BEHIND is not None:
+    raise ValueError("STORE_MULTIPROCESS does not support write-behind")
+FILE_STATES = {}
+LOCK_FILES = {}
+SNAPSHOT_FORMAT = getenv("STORE_SNAPSHOT_FORMAT", "json")
+if SNAPSHOT_FORMAT not in ("json", "binary"):
+    raise ValueError("unknown STORE_SNAPSHOT_FORMAT: {}".format(
+        SNAPSHOT_FORMAT))
+COMPRESS = getenv("STORE_COMPRESS", "none")
+if COMPRESS not in snapshot.COMPRESSORS:
+    raise ValueError("unknown STORE_COMPRESS: {}".format(COMPRESS))
+
+
+def flush():
+    """ Write out the changes still held back by write-behind mode
+    """
+    if WRITE_BEHIND is not None:
+        WRITE_BEHIND.flush()
+
+
+def _locks(s_class: str) -> Tuple[RWLock, threading.RLock]:
+    """ Return the lock of the objects of a class and the one of its files
+    """
+    locks = LOCKS.get(s_class)
+    if locks is None:
+        locks = LOCKS.setdefault(s_class, (RWLock(), threading.RLock()))
+    return locks
+
+
+def _snapshot_path(s_class: str) -> str:
+    """ Return the snapshot file of a class in the configured format
+    """
+    if SNAPSHOT_FORMAT == "binary":
+        return ".db_{}.bin".format(s_class)
+    return ".db_{}.json".format(s_class)
+
+
+def _file_state(s_class: str) -> tuple:
+    """ Return the inode, size and mtime of the files of a class
+    """
+    state = []
+    for name in (_snapshot_path(s_class), ".db_{}.journal".format(s_class)):
+        try:
+            st = os.stat(name)
+        except FileNotFoundError:
+            state.append(None)
+            continue
+        state.append((st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(state)
+
+
+@contextmanager
+def _file_locked(s_class: str, exclusive: bool = True) -> Iterator[None]:
+    """ Hold the advisory lock shared by the processes using the files
+    of a class, in multi-process mode
+
+    Callers hold the file lock of the class, so the lock file of this
+    process is only used by one thread at a time and nested calls keep
+    the lock taken by the outermost one.
+    """
+    if not MULTIPROCESS:
+        yield
+        return
+    entry = LOCK_FILES.get(s_class)
+    if entry is None or entry[0] != os.getpid():
+        fd = os.open(".db_{}.lock".format(s_class), os.O_RDWR | os.O_CREAT,
+                     0o644)
+        entry = LOCK_FILES[s_class] = [os.getpid(), fd, 0]
+    if entry[2] == 0:
+        fcntl.flock(entry[1], fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    entry[2] += 1
+    try:
+        yield
+    finally:
+        entry[2] -= 1
+        if entry[2] == 0:
+            fcntl.flock(entry[1], fcntl.LOCK_UN)
+
+
+def _index_add(s_class: str, obj_id: str, values: dict):
+    """ Add an object's indexed attribute values to the indexes
+    """
+    indexes = INDEXES.setdefault(s_class, {})
+    for attr, value in values.items():
+        buckets = indexes.setdefault(attr, {})
+        try:
+            bucket = buckets.get(value)
+        except TypeError:
+            continue
+        if bucket is None:
+            bucket = buckets[value] = {}
+            keys = VALUES.get(s_class, {}).get(attr)
+            if keys is not None and type(value) is str:
+                insort(keys, value)
+        bucket[obj_id] = None
+
+
+def _index_remove(s_class: str, obj_id: str, values: dict):
+    """ Remove an object's indexed attribute values from the indexes
+    """
+    indexes = INDEXES.get(s_class, {})
+    for attr, value in values.items():
+        try:
+            bucket = indexes.get(attr, {}).get(value)
+        except TypeError:
+            continue
+        if bucket is not None and obj_id in bucket:
+            del bucket[obj_id]
+            if not bucket:
+                del indexes[attr][value]
+                keys = VALUES.get(s_class, {}).get(attr)
+                if keys is not None and type(value) is str:
+                    del keys[bisect_left(keys, value)]
+
+
+def _sorted_values(s_class: str, attr: str) -> List[str]:
+    """ Return the string values of an indexed attribute in order,
+    building them once
+    """
+    values = VALUES.setdefault(s_class, {})
+    keys = values.get(attr)
+    if keys is None:
+        keys = values[attr] = sorted(
+            value for value in INDEXES.get(s_class, {}).get(attr, {})
+            if type(value) is str)
+    return keys
+
+
+def _scan_sorted(s_class: str, get_keys: Callable[[], list], low=None,
+                 high=None, reverse: bool = False,
+                 chunk: int = 256) -> Iterator:
+    """ Yield the keys of a sorted list from `low` to `high` included
+
+    The keys are copied a chunk at a time under the read lock of the
+    class and each chunk starts after the last key yielded, so changes
+    made meanwhile never make the scan skip or repeat a key.
+    """
+    lock = _locks(s_class)[0]
+    last = None
+    while True:
+        with lock.read():
+            keys = get_keys()
+            if not reverse:
+                if last is not None:
+                    start = bisect_right(keys, last)
+                else:
+                    start = 0 if low is None else bisect_left(keys, low)
+                found = keys[start:start + chunk]
+            else:
+                if last is not None:
+                    end = bisect_left(keys, last)
+                else:
+                    end = len(keys) if high is None else bisect_right(
+                        keys, high)
+                found = keys[max(end - chunk, 0):end][::-1]
+        for key in found:
+            if (high is not None and key > high
+                    or low is not None and key < low):
+                return
+            yield key
+        if len(found) < chunk:
+            return
+        last = found[-1]
+
+
+def _indexed_values(obj: TypeVar('Base'), attrs: Iterable[str] = None):
+    """ Return the values of the indexed attributes of an object
+    """
+    attrs = obj.indexes if attrs is None else attrs
+    return {attr: getattr(obj, attr, None) for attr in attrs}
+
+
+def _record_values(obj_json: dict, attrs: Iterable[str]) -> dict:
+    """ Return the values of the indexed attributes of a raw record
+    """
+    return {attr: obj_json.get(attr) for attr in attrs}
+
+
+def _order_key(value) -> Tuple[str, str]:
+    """ Return the (created_at, id) key of an object or raw record
+    """
+    if type(value) is dict:
+        return (value.get('created_at') or '', value.get('id') or '')
+    return (value.created_at.isoformat(timespec='seconds'), value.id)
+
+
+def _ordered(s_class: str) -> List[Tuple[str, str]]:
+    """ Return the keys of a class sorted by creation, building them once
+    """
+    keys = ORDERED.get(s_class)
+    if keys is None:
+        objs = DATA.get(s_class, {})
+        if isinstance(objs, LazyObjects):
+            values = (objs.peek(obj_id) for obj_id in objs)
+        else:
+            values = list(objs.values())
+        keys = ORDERED[s_class] = sorted(map(_order_key, values))
+    return keys
+
+
+def _order_add(s_class: str, obj):
+    """ Insert an object in the creation order, if it is already built
+    """
+    keys = ORDERED.get(s_class)
+    if keys is not None:
+        insort(keys, _order_key(obj))
+
+
+def _order_remove(s_class: str, obj):
+    """ Take an object out of the creation order, if it is already built
+    """
+    keys = ORDERED.get(s_class)
+    if keys is None:
+        return
+    key = _order_key(obj)
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """ Parse a timestamp stored with TIMESTAMP_FORMAT
+    """
+    return datetime.fromisoformat(value)
+
+
+def _timestamp_property(slot: str) -> property:
+    """ Property exposing as a datetime the integer seconds in `slot`
+    """
+    def getter(self) -> datetime:
+        return EPOCH + timedelta(seconds=getattr(self, slot))
+
+    def setter(self, value: datetime):
+        setattr(self, slot, (value - EPOCH) // timedelta(seconds=1))
+
+    return property(getter, setter)
+
+
+@lru_cache(maxsize=None)
+def _slot_names(cls: type) -> Tuple[str, ...]:
+    """ Return the JSON keys of a compact class, in declaration order
+    """
+    timestamps = {'_created_at': 'created_at', '_updated_at': 'updated_at'}
+    return tuple(timestamps.get(slot, slot)
+                 for klass in reversed(cls.__mro__)
+                 for slot in klass.__dict__.get('__slots__', ())
+                 if slot != JSON_CACHE)
 
 
 class Base():
     """ Base class
+
+    Subclasses list in `indexes` the attributes `search` should find
+    through a dictionary lookup instead of a scan of every object. The
+    objects of each class are also kept sorted by `created_at` and `id`
+    for `page`.
+
+    In compact mode (STORE_COMPACT=1) models declare their attributes in
+    `__slots__` instead of carrying a `__dict__`, and timestamps are
+    kept as integer seconds since the epoch.
+
+    With STORE_BACKEND set to another backend than the JSON store, the
+    objects are kept by that `Store` instead of DATA.
+
+    The public JSON encoding of an object, the one listings send, is
+    memoized until one of its attributes is set. The serialization form
+    saved to file is built on demand so that it holds no memory between
+    saves.
+
+    The objects of a class are guarded by a reader/writer lock, so
+    searches run side by side and only wait for changes, and its files
+    by a second lock taken first, so saves are written one at a time.
+
+    In multi-process mode (STORE_MULTIPROCESS=1) the files are also
+    locked with `flock` while they are written or read back, and a class
+    is reloaded before use whenever another process changed its files.
     """
 
+    indexes = ()
+    if COMPACT:
+        __slots__ = ('id', '_created_at', '_updated_at', JSON_CACHE)
+        created_at = _timestamp_property('_created_at')
+        updated_at = _timestamp_property('_updated_at')
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+        DATA.setdefault(s_class, {})
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = _parse_timestamp(kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = _parse_timestamp(kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
 
+    def __setattr__(self, name: str, value):
+        """ Set an attribute, keeping the indexes of stored objects in sync
+        and dropping the memoized JSON fragment
+        """
+        super().__setattr__(JSON_CACHE, None)
+        ordered = name == 'created_at'
+        indexed = name in self.indexes
+        if not (ordered or indexed) or not self._is_stored():
+            super().__setattr__(name, value)
+            return
+        s_class = self.__class__.__name__
+        with _locks(s_class)[0].write():
+            if ordered:
+                ORDERED.pop(s_class, None)
+            if indexed:
+                _index_remove(s_class, self.id,
+                              _indexed_values(self, (name,)))
+            super().__setattr__(name, value)
+            if indexed:
+                _index_add(s_class, self.id, {name: value})
+
+    def _is_stored(self) -> bool:
+        """ Whether this very instance is the one kept in DATA
+        """
+        objs = DATA.get(self.__class__.__name__, {})
+        obj_id = getattr(self, 'id', None)
+        if isinstance(objs, LazyObjects):
+            return objs.peek(obj_id) is self
+        return objs.get(obj_id) is self
+
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
         """
@@ -47,8 +392,32 @@ class Base():
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
         """
+        return self._build_json(for_serialization)
+
+    def json_fragment(self, for_serialization: bool = False) -> str:
+        """ Return the object encoded as a JSON string, the public form
+        memoized
+        """
+        if for_serialization:
+            return json.dumps(self._build_json(True))
+        fragment = getattr(self, JSON_CACHE, None)
+        if fragment is None:
+            fragment = json.dumps(self._build_json(False))
+            super().__setattr__(JSON_CACHE, fragment)
+        return fragment
+
+    def _build_json(self, for_serialization: bool) -> dict:
+        """ Build the JSON dictionary of the object
+        """
         result = {}
-        for key, value in self.__dict__.items():
+        if COMPACT:
+            items = ((key, getattr(self, key))
+                     for key in _slot_names(self.__class__))
+        else:
+            items = self.__dict__.items()
+        for key, value in items:
+            if key == JSON_CACHE:
+                continue
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -60,53 +429,316 @@ class Base():
     @classmethod
     def load_from_file(cls):
         """ Load all objects from file
+
+        The snapshot is read first, then the journal of the changes made
+        since is replayed on top of it. In lazy mode the records are
+        kept as read and an object is only built when first accessed.
+        Changes of the class still held back by write-behind mode are
+        saved first so that they aren't lost.
         """
+        if BACKEND is not None:
+            BACKEND.load(cls)
+            return
+        if WRITE_BEHIND is not None:
+            WRITE_BEHIND.flush(cls)
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        store_lock, file_lock = _locks(s_class)
+        with file_lock, _file_locked(s_class, exclusive=False):
+            with store_lock.write():
+                cls._load(s_class)
+
+    @classmethod
+    def _refresh(cls, s_class: str):
+        """ Reload the class if another process changed its files
+
+        When only records were appended to the journal since the last
+        load, just those records are replayed.
+        """
+        if not MULTIPROCESS or FILE_STATES.get(s_class) == _file_state(
+                s_class):
             return
+        store_lock, file_lock = _locks(s_class)
+        with file_lock, _file_locked(s_class, exclusive=False):
+            old, new = FILE_STATES.get(s_class), _file_state(s_class)
+            if old == new:
+                return
+            with store_lock.write():
+                if (old is not None and old[0] == new[0] and old[1]
+                        and new[1] and old[1][0] == new[1][0]
+                        and old[1][1] < new[1][1]):
+                    cls._replay(s_class, journal.read(
+                        ".db_{}.journal".format(s_class), old[1][1]))
+                    FILE_STATES[s_class] = _file_state(s_class)
+                else:
+                    cls._load(s_class)
+
+    @classmethod
+    def _replay(cls, s_class: str, records: List[dict]):
+        """ Apply journal records to the objects of the class in memory
+        """
+        objs = DATA.setdefault(s_class, {})
+        lazy = isinstance(objs, LazyObjects)
+        for record in records:
+            obj_id = record['id']
+            old = objs.peek(obj_id) if lazy else objs.get(obj_id)
+            if old is not None:
+                _index_remove(s_class, obj_id, (
+                    _record_values(old, cls.indexes) if type(old) is dict
+                    else _indexed_values(old)))
+                _order_remove(s_class, old)
+            if record['op'] != 'save':
+                if old is not None:
+                    del objs[obj_id]
+                continue
+            if lazy:
+                obj = record['obj']
+                objs.set_raw(obj_id, obj)
+                _index_add(s_class, obj_id,
+                           _record_values(obj, cls.indexes))
+            else:
+                obj = objs[obj_id] = cls(**record['obj'])
+                _index_add(s_class, obj_id, _indexed_values(obj))
+            _order_add(s_class, obj)
+        JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + len(records)
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
+    @classmethod
+    def _load(cls, s_class: str):
+        """ Replace the objects of the class with the ones on file
+        """
+        file_path = _snapshot_path(s_class)
+        objs_json = {}
+        if path.exists(file_path) and SNAPSHOT_FORMAT == "binary":
+            with open(file_path, 'rb') as f:
+                objs_json = dict(snapshot.load(f))
+        elif path.exists(file_path):
+            with open(file_path, 'r') as f:
+                objs_json = json.load(f)
+        records = journal.read(".db_{}.journal".format(s_class))
+        for record in records:
+            if record['op'] == 'save':
+                objs_json[record['id']] = record['obj']
+            else:
+                objs_json.pop(record['id'], None)
+        JOURNAL_SIZES[s_class] = len(records)
+        INDEXES[s_class] = {}
+        VALUES.pop(s_class, None)
+        ORDERED.pop(s_class, None)
+        if LAZY_LOAD:
+            DATA[s_class] = LazyObjects(cls, objs_json)
             for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+                _index_add(s_class, obj_id,
+                           _record_values(obj_json, cls.indexes))
+        else:
+            DATA[s_class] = {}
+            for obj_id, obj_json in objs_json.items():
+                obj = cls(**obj_json)
+                DATA[s_class][obj_id] = obj
+                _index_add(s_class, obj_id, _indexed_values(obj))
+        if MULTIPROCESS:
+            FILE_STATES[s_class] = _file_state(s_class)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
+
+        The snapshot is written to a temporary file of its own renamed
+        over the old one, so a crash never leaves a partial snapshot and
+        concurrent writers never rename each other's file, and the journal
+        it now contains is dropped. It is JSON text, or the format of
+        models.snapshot with STORE_SNAPSHOT_FORMAT=binary. In multi-process
+        mode the changes of other processes are loaded first, under the
+        lock of the files, so the snapshot doesn't drop them.
         """
+        if BACKEND is not None:
+            return
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        file_path = _snapshot_path(s_class)
+        binary = SNAPSHOT_FORMAT == "binary"
+        store_lock, file_lock = _locks(s_class)
+        with file_lock, _file_locked(s_class):
+            cls._refresh(s_class)
+            with store_lock.read():
+                objs = DATA[s_class]
+                if binary and isinstance(objs, LazyObjects):
+                    records = list(objs.records())
+                elif binary:
+                    records = [(obj_id, obj.to_json(True))
+                               for obj_id, obj in objs.items()]
+                elif isinstance(objs, LazyObjects):
+                    fragments = list(objs.fragments())
+                else:
+                    fragments = [(obj_id, obj.json_fragment(True))
+                                 for obj_id, obj in objs.items()]
+
+            fd, tmp_path = tempfile.mkstemp(
+                dir=path.dirname(file_path) or '.',
+                prefix=path.basename(file_path) + '.')
+            try:
+                with os.fdopen(fd, 'wb' if binary else 'w') as f:
+                    if binary:
+                        snapshot.dump(records, f, COMPRESS)
+                    else:
+                        f.write('{' + ', '.join(
+                            '{}: {}'.format(json.dumps(obj_id), frag)
+                            for obj_id, frag in fragments) + '}')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                if path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            journal.clear(".db_{}.journal".format(s_class))
+            JOURNAL_SIZES[s_class] = 0
+            if MULTIPROCESS:
+                FILE_STATES[s_class] = _file_state(s_class)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def compact(cls):
+        """ Fold the journal into a new snapshot
+        """
+        cls.save_to_file()
+
+    @classmethod
+    def _persist(cls, record: dict):
+        """ Persist one change, as a journal record in journal mode
+
+        In write-behind mode the snapshot is only marked dirty and
+        rewritten later by the background flusher. Callers hold the file
+        lock of the class.
+        """
+        if STORE_MODE != "journal":
+            if WRITE_BEHIND is not None:
+                WRITE_BEHIND.mark(cls)
+            else:
+                cls.save_to_file()
+            return
+        s_class = cls.__name__
+        journal.append(".db_{}.journal".format(s_class), record)
+        JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + 1
+        if JOURNAL_SIZES[s_class] >= COMPACT_EVERY:
+            cls.compact()
+        elif MULTIPROCESS:
+            FILE_STATES[s_class] = _file_state(s_class)
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        if BACKEND is not None:
+            BACKEND.save(self)
+            return
+        store_lock, file_lock = _locks(s_class)
+        with file_lock, _file_locked(s_class):
+            self.__class__._refresh(s_class)
+            with store_lock.write():
+                old = DATA[s_class].get(self.id)
+                if old is not None:
+                    _index_remove(s_class, self.id, _indexed_values(old))
+                    _order_remove(s_class, old)
+                DATA[s_class][self.id] = self
+                _index_add(s_class, self.id, _indexed_values(self))
+                _order_add(s_class, self)
+                record = {'op': 'save', 'id': self.id,
+                          'obj': self.to_json(True)}
+            self.__class__._persist(record)
+
+    @classmethod
+    def save_many(cls, objs: Iterable[TypeVar('Base')],
+                  batch_size: int = 10000) -> int:
+        """ Save many objects, writing the snapshot a single time
+
+        The objects are put in DATA a batch at a time, so searches can
+        run between batches, and are saved as given: their timestamps
+        are kept.
+
+        Args:
+            objs: objects of the class, possibly a generator.
+            batch_size: number of objects inserted per batch.
+        Return:
+            the number of objects saved.
+        """
+        if BACKEND is not None:
+            return BACKEND.save_many(cls, objs)
+        s_class = cls.__name__
+        store_lock, file_lock = _locks(s_class)
+        objs = iter(objs)
+        count = 0
+        with file_lock, _file_locked(s_class):
+            cls._refresh(s_class)
+            while True:
+                batch = list(itertools.islice(objs, batch_size))
+                if not batch:
+                    break
+                with store_lock.write():
+                    ORDERED.pop(s_class, None)
+                    VALUES.pop(s_class, None)
+                    stored = DATA.setdefault(s_class, {})
+                    for obj in batch:
+                        old = stored.get(obj.id)
+                        if old is not None:
+                            _index_remove(s_class, obj.id,
+                                          _indexed_values(old))
+                        stored[obj.id] = obj
+                        _index_add(s_class, obj.id, _indexed_values(obj))
+                count += len(batch)
+            if count:
+                cls.save_to_file()
+        return count
+
+    @classmethod
+    def records(cls) -> Iterator[Tuple[str, dict]]:
+        """ Yield the id and serializable form of every object
+
+        The forms are built on the fly: lazy records are not hydrated
+        and the JSON of the objects is not memoized.
+        """
+        if BACKEND is not None:
+            yield from BACKEND.records(cls)
+            return
+        s_class = cls.__name__
+        cls._refresh(s_class)
+        with _locks(s_class)[0].read():
+            objs = DATA.get(s_class, {})
+            if isinstance(objs, LazyObjects):
+                items = [(obj_id, objs.peek(obj_id)) for obj_id in objs]
+            else:
+                items = list(objs.items())
+        for obj_id, value in items:
+            if type(value) is dict:
+                yield obj_id, value
+            else:
+                yield obj_id, value._build_json(True)
 
     def remove(self):
         """ Remove object
         """
+        if BACKEND is not None:
+            BACKEND.remove(self)
+            return
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        store_lock, file_lock = _locks(s_class)
+        with file_lock, _file_locked(s_class):
+            self.__class__._refresh(s_class)
+            with store_lock.write():
+                obj = DATA[s_class].get(self.id)
+                if obj is None:
+                    return
+                _index_remove(s_class, self.id, _indexed_values(obj))
+                _order_remove(s_class, obj)
+                del DATA[s_class][self.id]
+            self.__class__._persist({'op': 'remove', 'id': self.id})
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
+        if BACKEND is not None:
+            return BACKEND.count(cls)
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        cls._refresh(s_class)
+        return len(DATA[s_class])
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -114,17 +746,174 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def page(cls, limit: int, after: Tuple[str, str] = None
+             ) -> Tuple[List[TypeVar('Base')], Optional[Tuple[str, str]]]:
+        """ Return up to `limit` objects ordered by creation
+
+        Args:
+            limit: maximum number of objects returned.
+            after: (created_at, id) key of the last object of the
+                previous page, None for the first page.
+        Return:
+            the objects of the page and the key to pass as `after` for
+            the next page, None on the last page.
+        """
+        if BACKEND is not None:
+            return BACKEND.page(cls, limit, after)
+        s_class = cls.__name__
+        cls._refresh(s_class)
+        with _locks(s_class)[0].read():
+            keys = _ordered(s_class)
+            start = 0 if after is None else bisect_right(keys, tuple(after))
+            page_keys = keys[start:start + limit]
+            objs = DATA[s_class]
+            page = [objs[obj_id] for _, obj_id in page_keys]
+            more = start + limit < len(keys)
+        if not more or not page_keys:
+            return page, None
+        return page, page_keys[-1]
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
+        if BACKEND is not None:
+            return BACKEND.get(cls, id)
         s_class = cls.__name__
+        cls._refresh(s_class)
         return DATA[s_class].get(id)
 
     @classmethod
-    def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
+    def query(cls, order_by: str = None, limit: int = None,
+              **filters) -> Iterator[TypeVar('Base')]:
+        """ Iterate lazily over the objects matching the filters
+
+        Args:
+            order_by: attribute to sort on, prefixed with '-' for the
+                descending order; `created_at` follows the order of
+                `page`, by creation to the second then by id.
+            limit: maximum number of objects returned.
+            filters: `attr=value` or `attr__op=value` conditions, with
+                the operators of models.query.
+        Return:
+            iterator over the matching objects. An equality, range or
+            prefix condition on an indexed attribute, or a range on
+            `created_at`, narrows the objects looked at. Nothing past
+            `limit` is looked at when no sort is needed.
+        """
+        conditions = query.parse_filters(filters)
+        reverse = order_by is not None and order_by[0] == '-'
+        order = order_by[1:] if reverse else order_by
+
+        def results():
+            objs, ordered = cls._candidates(conditions, order, reverse)
+            found = (obj for obj in objs if query.matches(obj, conditions))
+            if order is not None and not ordered:
+                if order == 'created_at':
+                    key = _order_key
+                else:
+                    def key(obj):
+                        value = getattr(obj, order, None)
+                        return (value is not None, value, obj.id)
+                if limit is None:
+                    found = iter(sorted(found, key=key, reverse=reverse))
+                else:
+                    select = heapq.nlargest if reverse else heapq.nsmallest
+                    found = iter(select(limit, found, key=key))
+            yield from itertools.islice(found, limit)
+
+        return results()
+
+    @classmethod
+    def _candidates(cls, conditions: List[Tuple[str, str, object]],
+                    order: str, reverse: bool
+                    ) -> Tuple[Iterator[TypeVar('Base')], bool]:
+        """ Objects that may match the conditions, and whether they come
+        sorted on `order`
+        """
+        if BACKEND is not None:
+            equal = {attr: value for attr, op, value in conditions
+                     if op == 'eq'}
+            return iter(BACKEND.search(cls, equal)), False
+        s_class = cls.__name__
+        cls._refresh(s_class)
+        store_lock = _locks(s_class)[0]
+
+        for attr, op, value in conditions:
+            if op == 'eq' and attr in cls.indexes:
+                with store_lock.read():
+                    try:
+                        ids = list(INDEXES.get(s_class, {}).get(
+                            attr, {}).get(value, ()))
+                    except TypeError:
+                        continue
+                return cls._objects(s_class, ids), False
+
+        for attr in cls.indexes:
+            values = [value for name, op, value in conditions
+                      if name == attr and op in query.RANGE_OPERATORS]
+            if values and all(type(value) is str for value in values):
+                low, high = query.bounds(conditions, attr)
+                keys = _scan_sorted(
+                    s_class, lambda: _sorted_values(s_class, attr), low,
+                    high, reverse and order == attr)
+                ids = (obj_id for key in keys
+                       for obj_id in cls._bucket(s_class, attr, key))
+                return cls._objects(s_class, ids), order == attr
+
+        created = [value for name, op, value in conditions
+                   if name == 'created_at'
+                   and op in ('lt', 'le', 'gt', 'ge')]
+        bounded = created and all(type(value) is datetime
+                                  for value in created)
+        if order == 'created_at' or bounded:
+            low = high = None
+            if bounded:
+                low, high = query.bounds(
+                    conditions, 'created_at',
+                    lambda value: value.strftime(TIMESTAMP_FORMAT))
+            keys = _scan_sorted(
+                s_class, lambda: _ordered(s_class),
+                None if low is None else (low,),
+                None if high is None else (high + '\x00',),
+                reverse and order == 'created_at')
+            return (cls._objects(s_class, (obj_id for _, obj_id in keys)),
+                    order == 'created_at')
+
+        with store_lock.read():
+            ids = list(DATA.get(s_class, {}))
+        return cls._objects(s_class, ids), False
+
+    @classmethod
+    def _bucket(cls, s_class: str, attr: str, value) -> List[str]:
+        """ Ids of the objects whose indexed `attr` equals `value`
+        """
+        with _locks(s_class)[0].read():
+            return list(INDEXES.get(s_class, {}).get(attr, {}).get(
+                value, ()))
+
+    @classmethod
+    def _objects(cls, s_class: str,
+                 ids: Iterable[str]) -> Iterator[TypeVar('Base')]:
+        """ Objects with these ids, skipping the ones removed meanwhile
+        """
+        for obj_id in ids:
+            obj = DATA.get(s_class, {}).get(obj_id)
+            if obj is not None:
+                yield obj
+
+    @classmethod
+    def search(cls, attributes: dict = None) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        Objects are looked up through the index of the first indexed
+        attribute searched on, if any, and checked on the others.
         """
+        if attributes is None:
+            attributes = {}
+        if BACKEND is not None:
+            return BACKEND.search(cls, attributes)
         s_class = cls.__name__
         def _search(obj):
             if len(attributes) == 0:
@@ -133,5 +922,20 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        cls._refresh(s_class)
+        with _locks(s_class)[0].read():
+            objs = DATA[s_class]
+            candidates = None
+            indexes = INDEXES.get(s_class, {})
+            for k in cls.indexes:
+                if k in attributes:
+                    try:
+                        obj_ids = indexes.get(k, {}).get(attributes[k], {})
+                    except TypeError:
+                        continue
+                    candidates = [objs[i] for i in obj_ids]
+                    break
+            if candidates is None:
+                candidates = list(objs.values())
+            return list(filter(_search, candidates))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+""" Bulk module
+
+Imports NDJSON or CSV records into a model class and exports a class to
+NDJSON, both streamed. Imported objects are put in DATA a batch at a
+time and the snapshot is written once at the end, instead of once per
+object as `save` does.
+
+    python3 -m models.bulk import User users.ndjson [--workers 4]
+    python3 -m models.bulk export User [users.ndjson]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from models.user import User, hash_password
+from models.user_session import UserSession
+from typing import Iterable, Iterator, List, TextIO, Tuple, Type
+import argparse
+import csv
+import json
+import sys
+import time
+
+
+MODELS = {'User': User, 'UserSession': UserSession}
+
+
+def read_records(f: TextIO, fmt: str = 'ndjson') -> Iterator[dict]:
+    """ Yield the records of an NDJSON or CSV file, one at a time
+
+    Empty CSV cells are read as None.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(f):
+            yield {key: value if value != '' else None
+                   for key, value in row.items()}
+        return
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError("line {}: {}".format(number, e))
+
+
+def _hash_chunk(passwords: List[str]) -> List[str]:
+    """ Hash a chunk of passwords, in a worker process
+    """
+    return [hash_password(pwd) for pwd in passwords]
+
+
+def hash_passwords(passwords: List[str], pool: ProcessPoolExecutor = None,
+                   chunk_size: int = 2000) -> List[str]:
+    """ Hash passwords in order, spread over the processes of `pool`
+    """
+    if pool is None:
+        return _hash_chunk(passwords)
+    chunks = [passwords[i:i + chunk_size]
+              for i in range(0, len(passwords), chunk_size)]
+    return [hashed for chunk in pool.map(_hash_chunk, chunks)
+            for hashed in chunk]
+
+
+def build_objects(cls: Type, records: Iterable[dict],
+                  pool: ProcessPoolExecutor = None,
+                  batch_size: int = 10000) -> Iterator:
+    """ Yield the objects of the records, hashing the plaintext
+    `password` of users a batch at a time
+    """
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        clear = [i for i, record in enumerate(batch)
+                 if type(record.get('password')) is str]
+        if cls is User and clear:
+            hashed = hash_passwords([batch[i]['password'] for i in clear],
+                                    pool)
+            for i, password in zip(clear, hashed):
+                batch[i]['_password'] = password
+        for record in batch:
+            record.pop('password', None)
+            yield cls(**record)
+
+
+def import_records(cls: Type, f: TextIO, fmt: str = 'ndjson',
+                   workers: int = 1,
+                   batch_size: int = 10000) -> Tuple[int, float]:
+    """ Save the records of a file as objects of `cls`
+
+    Args:
+        cls: model class to import into.
+        f: NDJSON or CSV file.
+        fmt: `ndjson` or `csv`.
+        workers: processes hashing the passwords, in this process if 1.
+        batch_size: number of records parsed and inserted at a time.
+    Return:
+        the number of records imported and the seconds taken.
+    """
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        objs = build_objects(cls, read_records(f, fmt), pool, batch_size)
+        count = cls.save_many(objs, batch_size)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return count, time.perf_counter() - start
+
+
+def export_records(cls: Type, f: TextIO) -> Tuple[int, float]:
+    """ Write every object of `cls` to `f` as NDJSON, one at a time
+
+    Return:
+        the number of records exported and the seconds taken.
+    """
+    start = time.perf_counter()
+    count = 0
+    for _, record in cls.records():
+        f.write(json.dumps(record) + '\n')
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    """ Import records into a model class or export it to NDJSON
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('command', choices=('import', 'export'))
+    parser.add_argument('model', choices=sorted(MODELS))
+    parser.add_argument('file', nargs='?',
+                        help='file to import or export, stdin/stdout '
+                             'by default')
+    parser.add_argument('--format', choices=('ndjson', 'csv'),
+                        help='import format, from the file extension by '
+                             'default')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes hashing the passwords')
+    parser.add_argument('--batch-size', type=int, default=10000,
+                        help='records inserted at a time')
+    args = parser.parse_args()
+
+    cls = MODELS[args.model]
+    cls.load_from_file()
+    if args.command == 'export':
+        if args.file is None:
+            count, seconds = export_records(cls, sys.stdout)
+        else:
+            with open(args.file, 'w') as f:
+                count, seconds = export_records(cls, f)
+    else:
+        fmt = args.format or ('csv' if (args.file or '').endswith('.csv')
+                              else 'ndjson')
+        if args.file is None:
+            count, seconds = import_records(cls, sys.stdin, fmt,
+                                            args.workers, args.batch_size)
+        else:
+            with open(args.file, newline='') as f:
+                count, seconds = import_records(cls, f, fmt, args.workers,
+                                                args.batch_size)
+    rate = count / seconds if seconds else float(count)
+    print('{}ed {} {} records in {:.2f}s ({:.0f} records/s)'.format(
+        args.command, count, args.model, seconds, rate), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
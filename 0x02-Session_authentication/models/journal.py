@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+""" Journal module
+
+Append-only log of the changes made to a class since its last snapshot.
+Each line is one JSON record; a line left incomplete by a crash is
+dropped, along with anything after it, when the journal is read back.
+"""
+import json
+import os
+from typing import List
+
+
+def append(file_path: str, record: dict):
+    """ Append one record to the journal
+    """
+    with open(file_path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def read(file_path: str, offset: int = 0) -> List[dict]:
+    """ Return the records of the journal from byte `offset`, cutting off
+    a torn tail
+    """
+    if not os.path.exists(file_path):
+        return []
+    records = []
+    good = offset
+    with open(file_path, 'rb+') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            good += len(line)
+        f.truncate(good)
+    return records
+
+
+def clear(file_path: str):
+    """ Drop the journal once its records are part of a snapshot
+    """
+    if os.path.exists(file_path):
+        os.remove(file_path)
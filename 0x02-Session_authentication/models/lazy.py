@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+""" Lazy module
+
+Mapping of object ids to objects that keeps the records read from the
+store as plain dictionaries and only builds the object of a record the
+first time it is accessed.
+"""
+from collections.abc import MutableMapping
+from typing import Iterator, Tuple, Type
+import json
+import threading
+
+
+class LazyObjects(MutableMapping):
+    """ Objects of one class, hydrated on first access
+    """
+
+    def __init__(self, cls: Type, records: dict = None):
+        """ Initialize the mapping with raw records keyed by id
+        """
+        self._cls = cls
+        self._data = {} if records is None else records
+        self._hydrating = threading.Lock()
+
+    def set_raw(self, obj_id: str, obj_json: dict):
+        """ Store a raw record, replacing any object with the same id
+        """
+        self._data[obj_id] = obj_json
+
+    def peek(self, obj_id: str):
+        """ Return the stored object or raw record without hydrating it
+        """
+        return self._data.get(obj_id)
+
+    def hydrated(self) -> int:
+        """ Number of records already turned into objects
+        """
+        return sum(1 for value in self._data.values()
+                   if type(value) is not dict)
+
+    def fragments(self) -> Iterator[Tuple[str, str]]:
+        """ Yield the id and JSON encoding of every record, hydrated or not
+        """
+        for obj_id, value in list(self._data.items()):
+            if type(value) is dict:
+                yield obj_id, json.dumps(value)
+            else:
+                yield obj_id, value.json_fragment(True)
+
+    def records(self) -> Iterator[Tuple[str, dict]]:
+        """ Yield the id and serializable form of every record
+        """
+        for obj_id, value in list(self._data.items()):
+            if type(value) is dict:
+                yield obj_id, value
+            else:
+                yield obj_id, value.to_json(True)
+
+    def __getitem__(self, obj_id: str):
+        """ Return the object with this id, building it if needed
+
+        Two threads reaching the same record get the same object.
+        """
+        value = self._data[obj_id]
+        if type(value) is dict:
+            with self._hydrating:
+                value = self._data[obj_id]
+                if type(value) is dict:
+                    value = self._cls(**value)
+                    self._data[obj_id] = value
+        return value
+
+    def __setitem__(self, obj_id: str, obj):
+        """ Store an object
+        """
+        self._data[obj_id] = obj
+
+    def __delitem__(self, obj_id: str):
+        """ Remove an object or raw record
+        """
+        del self._data[obj_id]
+
+    def __iter__(self) -> Iterator[str]:
+        """ Iterate over the ids in insertion order
+        """
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        """ Number of records, hydrated or not
+        """
+        return len(self._data)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+""" Query module
+
+Filters of `Base.query`: `attr=value` tests equality and
+`attr__op=value` applies one of the OPERATORS, e.g.
+`created_at__lt=datetime(2024, 1, 1)` or `email__startswith='bob'`.
+"""
+from typing import List, Tuple
+import operator
+
+
+OPERATORS = {
+    'eq': operator.eq,
+    'lt': operator.lt,
+    'le': operator.le,
+    'gt': operator.gt,
+    'ge': operator.ge,
+    'startswith': lambda value, prefix: (type(value) is str
+                                         and value.startswith(prefix)),
+}
+RANGE_OPERATORS = ('lt', 'le', 'gt', 'ge', 'startswith')
+
+
+def parse_filters(filters: dict) -> List[Tuple[str, str, object]]:
+    """ Split `attr__op` filters into (attr, op, value) conditions
+    """
+    conditions = []
+    for key, value in filters.items():
+        attr, _, op = key.partition('__')
+        op = op or 'eq'
+        if op not in OPERATORS:
+            raise ValueError("unknown query operator: {}".format(op))
+        conditions.append((attr, op, value))
+    return conditions
+
+
+def matches(obj, conditions: List[Tuple[str, str, object]]) -> bool:
+    """ Whether an object satisfies every condition
+
+    Values that cannot be compared, like None against a string, do not
+    match.
+    """
+    for attr, op, value in conditions:
+        try:
+            if not OPERATORS[op](getattr(obj, attr, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def bounds(conditions: List[Tuple[str, str, object]], attr: str,
+           convert=None) -> Tuple[object, object]:
+    """ Inclusive (low, high) bounds the conditions put on `attr`, None
+    when unbounded; `convert` maps the values to the keys of an index
+    """
+    low = high = None
+    for name, op, value in conditions:
+        if name != attr or op not in RANGE_OPERATORS:
+            continue
+        key = value if convert is None else convert(value)
+        if op == 'startswith':
+            op_low, op_high = key, key + '\U0010ffff'
+        elif op in ('gt', 'ge'):
+            op_low, op_high = key, None
+        else:
+            op_low, op_high = None, key
+        if op_low is not None and (low is None or op_low > low):
+            low = op_low
+        if op_high is not None and (high is None or op_high < high):
+            high = op_high
+    return low, high
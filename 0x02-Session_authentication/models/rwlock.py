@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+""" Reader/writer lock module
+
+Any number of readers can hold the lock together; a writer holds it
+alone. Waiting writers go before new readers so a steady stream of
+reads cannot starve them, which also means the read side must not be
+acquired twice by the same thread.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+import threading
+
+
+class RWLock():
+    """ Lock shared by readers and exclusive to one writer
+    """
+
+    def __init__(self):
+        """ Initialize an unlocked lock
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """ Hold the lock as one of possibly many readers
+        """
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """ Hold the lock alone
+        """
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+""" Snapshot module
+
+Versioned binary format for the snapshots of the store
+(STORE_SNAPSHOT_FORMAT=binary), optionally compressed (STORE_COMPRESS).
+
+A file is an 8-byte magic, a version byte, a compression byte, then the
+payload, compressed as a whole. The payload holds the records column by
+column: the ids as 16-byte UUIDs, the timestamps as 64-bit seconds since
+the epoch, and the other attributes as one JSON array per attribute.
+Ids or timestamps that do not fit the packed form are stored as JSON
+columns instead, and records whose keys differ from the first one keep
+their own key list, so any snapshot converts back to JSON unchanged.
+"""
+from array import array
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterable, Iterator, Tuple
+import argparse
+import json
+import lzma
+import re
+import struct
+import sys
+import zlib
+
+
+MAGIC = b'HBSNAP\x00\x00'
+VERSION = 1
+EPOCH = datetime(1970, 1, 1)
+COMPRESSORS = {
+    'none': (0, lambda data: data, lambda data: data),
+    'zlib': (1, zlib.compress, zlib.decompress),
+    'lzma': (2, lzma.compress, lzma.decompress),
+}
+PACKED = ('id', 'created_at', 'updated_at')
+UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-'
+                     r'[0-9a-f]{12}\Z')
+TIMESTAMP_RE = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\Z')
+MISSING = object()
+
+
+def _pack_ids(ids: list) -> bytes:
+    """ The ids as 16-byte UUIDs, None if one is not a lowercase UUID
+    """
+    if not all(type(obj_id) is str and UUID_RE.match(obj_id)
+               for obj_id in ids):
+        return None
+    return bytes.fromhex(''.join(ids).replace('-', ''))
+
+
+def _unpack_ids(data: bytes) -> list:
+    """ The UUID strings of packed ids
+    """
+    h = data.hex()
+    return ['{}-{}-{}-{}-{}'.format(h[i:i + 8], h[i + 8:i + 12],
+                                    h[i + 12:i + 16], h[i + 16:i + 20],
+                                    h[i + 20:i + 32])
+            for i in range(0, len(h), 32)]
+
+
+def _pack_timestamps(values: list) -> bytes:
+    """ The timestamps as seconds since the epoch, None if one is not a
+    timestamp to the second
+    """
+    if not all(type(value) is str and TIMESTAMP_RE.match(value)
+               for value in values):
+        return None
+    second = timedelta(seconds=1)
+    seconds = {}
+    result = array('q')
+    for value in values:
+        packed = seconds.get(value)
+        if packed is None:
+            packed = seconds[value] = (
+                datetime.fromisoformat(value) - EPOCH) // second
+        result.append(packed)
+    return result.tobytes()
+
+
+def _unpack_timestamps(data: bytes) -> list:
+    """ The timestamp strings of packed timestamps
+    """
+    seconds = array('q')
+    seconds.frombytes(data)
+    strings = {}
+    result = []
+    for value in seconds:
+        string = strings.get(value)
+        if string is None:
+            string = strings[value] = (
+                EPOCH + timedelta(seconds=value)).isoformat()
+        result.append(string)
+    return result
+
+
+def dump(records: Iterable[Tuple[str, dict]], f: BinaryIO,
+         compress: str = 'none'):
+    """ Write (id, record) pairs as a binary snapshot
+    """
+    code, compressor, _ = COMPRESSORS[compress]
+    records = [record for _, record in records]
+    fields = list(records[0]) if records else []
+    keys = records[0].keys() if records else None
+    odd = [[i, list(record)] for i, record in enumerate(records)
+           if list(record) != fields]
+    for _, record_keys in odd:
+        fields += [key for key in record_keys if key not in fields]
+    if len(fields) > len(keys or ()):
+        odd = [[i, list(record)] for i, record in enumerate(records)
+               if list(record) != fields]
+    columns = {key: [record.get(key) for record in records]
+               for key in fields}
+
+    packed = {}
+    packers = {'id': _pack_ids, 'created_at': _pack_timestamps,
+               'updated_at': _pack_timestamps}
+    incomplete = {key for _, record_keys in odd for key in fields
+                  if key not in record_keys}
+    for key, pack in packers.items():
+        if key in columns and key not in incomplete:
+            data = pack(columns[key])
+            if data is not None:
+                packed[key] = data
+                del columns[key]
+    header = json.dumps({'count': len(records), 'fields': fields,
+                         'packed': list(packed), 'odd': odd,
+                         'columns': columns}).encode()
+    payload = b''.join([struct.pack('<I', len(header)), header]
+                       + [struct.pack('<I', len(packed[key])) + packed[key]
+                          for key in packed])
+    f.write(MAGIC + bytes([VERSION, code]) + compressor(payload))
+
+
+def load(f: BinaryIO) -> Iterator[Tuple[str, dict]]:
+    """ Read the (id, record) pairs of a binary snapshot
+    """
+    head = f.read(len(MAGIC) + 2)
+    if head[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a binary snapshot")
+    version, code = head[len(MAGIC):]
+    if version != VERSION:
+        raise ValueError("unsupported snapshot version: {}".format(version))
+    decompress = [d for c, _, d in COMPRESSORS.values() if c == code]
+    if not decompress:
+        raise ValueError("unknown snapshot compression: {}".format(code))
+    payload = memoryview(decompress[0](f.read()))
+
+    size, = struct.unpack_from('<I', payload)
+    header = json.loads(bytes(payload[4:4 + size]))
+    offset = 4 + size
+    columns = header['columns']
+    unpackers = {'id': _unpack_ids, 'created_at': _unpack_timestamps,
+                 'updated_at': _unpack_timestamps}
+    for key in header['packed']:
+        size, = struct.unpack_from('<I', payload, offset)
+        columns[key] = unpackers[key](bytes(payload[offset + 4:
+                                                    offset + 4 + size]))
+        offset += 4 + size
+
+    fields = header['fields']
+    records = [dict(zip(fields, row))
+               for row in zip(*(columns[key] for key in fields))]
+    for i, record_keys in header['odd']:
+        records[i] = {key: records[i][key] for key in record_keys}
+    return ((record.get('id'), record) for record in records)
+
+
+def main():
+    """ Convert a snapshot between the JSON and the binary formats
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('direction', choices=('to-binary', 'to-json'))
+    parser.add_argument('src', help='snapshot to convert')
+    parser.add_argument('dst', help='converted snapshot')
+    parser.add_argument('--compress', choices=sorted(COMPRESSORS),
+                        default='none', help='compression of to-binary')
+    args = parser.parse_args()
+
+    if args.direction == 'to-binary':
+        with open(args.src) as src, open(args.dst, 'wb') as dst:
+            dump(json.load(src).items(), dst, args.compress)
+    else:
+        with open(args.src, 'rb') as src, open(args.dst, 'w') as dst:
+            json.dump(dict(load(src)), dst)
+    print('converted {} to {}'.format(args.src, args.dst), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+""" SQLite store module
+
+Keeps each Base class in a table of a SQLite database run in WAL mode.
+The id, the timestamps and the indexed attributes of a class get their
+own indexed columns; the whole serialized object is kept as JSON, so
+searches on other attributes go through `json_extract`.
+"""
+from functools import lru_cache
+from models.store import Store
+from typing import (Iterable, Iterator, List, Optional, Tuple, Type,
+                    TypeVar)
+import json
+import sqlite3
+import threading
+
+
+SQL_TYPES = (str, int, float, bool)
+
+
+@lru_cache(maxsize=None)
+def _statements(cls: Type) -> dict:
+    """ SQL statements of the table of `cls`, built once per class
+    """
+    table = '"{}"'.format(cls.__name__)
+    columns = ['"{}"'.format(attr) for attr in cls.indexes]
+    names = ', '.join(['id', 'created_at', 'updated_at'] + columns + ['data'])
+    schema = ['CREATE TABLE IF NOT EXISTS {} (id TEXT PRIMARY KEY, '
+              'created_at TEXT NOT NULL, updated_at TEXT NOT NULL, {}'
+              'data TEXT NOT NULL)'.format(table, ''.join(
+                  '{}, '.format(column) for column in columns)),
+              'CREATE INDEX IF NOT EXISTS "{}_created" ON {} '
+              '(created_at, id)'.format(cls.__name__, table)]
+    schema += ['CREATE INDEX IF NOT EXISTS "{}_{}" ON {} ({})'.format(
+        cls.__name__, attr, table, column)
+        for attr, column in zip(cls.indexes, columns)]
+    return {
+        'schema': schema,
+        'save': 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+            table, names, ', '.join('?' * (len(columns) + 4))),
+        'remove': 'DELETE FROM {} WHERE id = ?'.format(table),
+        'count': 'SELECT COUNT(*) FROM {}'.format(table),
+        'get': 'SELECT data FROM {} WHERE id = ?'.format(table),
+        'records': 'SELECT id, data FROM {}'.format(table),
+        'search': 'SELECT data FROM {} WHERE {{}} '
+                  'ORDER BY created_at, id'.format(table),
+        'first_page': 'SELECT created_at, id, data FROM {} '
+                      'ORDER BY created_at, id LIMIT ?'.format(table),
+        'page': 'SELECT created_at, id, data FROM {} '
+                'WHERE (created_at, id) > (?, ?) '
+                'ORDER BY created_at, id LIMIT ?'.format(table),
+    }
+
+
+class SQLiteStore(Store):
+    """ Store keeping the objects in a SQLite database
+    """
+
+    def __init__(self, file_path: str):
+        """ Initialize the store, each thread gets its own connection
+        """
+        self.file_path = file_path
+        self._local = threading.local()
+        self._tables = set()
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread, opened on first use
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_path, isolation_level=None,
+                                   cached_statements=256)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, cls: Type, name: str, params: tuple = (),
+                 sql: str = None) -> sqlite3.Cursor:
+        """ Run one of the statements of `cls`, creating its table first
+        """
+        conn = self._connection()
+        statements = _statements(cls)
+        if cls.__name__ not in self._tables:
+            for statement in statements['schema']:
+                conn.execute(statement)
+            self._tables.add(cls.__name__)
+        return conn.execute(sql or statements[name], params)
+
+    def load(self, cls: Type):
+        """ Create the table of `cls` if needed
+        """
+        self._execute(cls, 'count')
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or replace an object
+        """
+        self._execute(obj.__class__, 'save', self._params(obj))
+
+    def save_many(self, cls: Type, objs: Iterable[TypeVar('Base')]) -> int:
+        """ Insert or replace many objects of `cls` in one transaction
+        """
+        self.load(cls)
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN')
+            cursor = conn.executemany(_statements(cls)['save'],
+                                      map(self._params, objs))
+        return cursor.rowcount
+
+    def records(self, cls: Type) -> Iterator[Tuple[str, dict]]:
+        """ Yield the id and serializable form of every object of `cls`
+        """
+        for obj_id, data in self._execute(cls, 'records'):
+            yield obj_id, json.loads(data)
+
+    @staticmethod
+    def _params(obj: TypeVar('Base')) -> list:
+        """ Parameters of the save statement for an object
+        """
+        record = obj.to_json(True)
+        params = [obj.id, record['created_at'], record['updated_at']]
+        params += [getattr(obj, attr, None) for attr in obj.indexes]
+        params.append(obj.json_fragment(True))
+        return params
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object
+        """
+        self._execute(obj.__class__, 'remove', (obj.id,))
+
+    def count(self, cls: Type) -> int:
+        """ Count the objects of `cls`
+        """
+        return self._execute(cls, 'count').fetchone()[0]
+
+    def get(self, cls: Type, obj_id: str) -> TypeVar('Base'):
+        """ Return one object of `cls` by id, None if missing
+        """
+        row = self._execute(cls, 'get', (obj_id,)).fetchone()
+        return None if row is None else cls(**json.loads(row[0]))
+
+    def search(self, cls: Type,
+               attributes: dict) -> Iterable[TypeVar('Base')]:
+        """ Return the objects of `cls` with matching attributes
+
+        Values SQLite cannot compare, like datetimes, are checked on the
+        objects once loaded.
+        """
+        clauses = []
+        params = []
+        others = {}
+        for key, value in attributes.items():
+            if value is not None and type(value) not in SQL_TYPES:
+                others[key] = value
+                continue
+            if key in cls.indexes:
+                clauses.append('"{}" IS ?'.format(key))
+            elif key == 'id':
+                clauses.append('id IS ?')
+            else:
+                clauses.append('json_extract(data, ?) IS ?')
+                params.append('$."{}"'.format(key))
+            params.append(value)
+        sql = _statements(cls)['search'].format(
+            ' AND '.join(clauses) or '1')
+        objs = (cls(**json.loads(row[0]))
+                for row in self._execute(cls, 'search', params, sql))
+        return [obj for obj in objs
+                if all(getattr(obj, key) == value
+                       for key, value in others.items())]
+
+    def page(self, cls: Type, limit: int, after: Tuple[str, str] = None
+             ) -> Tuple[List[TypeVar('Base')], Optional[Tuple[str, str]]]:
+        """ Return up to `limit` objects ordered by creation, after the
+        (created_at, id) key `after`, and the key of the next page
+        """
+        if after is None:
+            rows = self._execute(cls, 'first_page', (limit + 1,))
+        else:
+            rows = self._execute(cls, 'page', (after[0], after[1],
+                                               limit + 1))
+        rows = rows.fetchall()
+        page = [cls(**json.loads(row[2])) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return page, None
+        return page, (rows[limit - 1][0], rows[limit - 1][1])
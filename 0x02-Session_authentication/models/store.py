@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" Store module
+
+Interface of the storage backends `Base` can delegate to instead of its
+built-in JSON store (STORE_BACKEND=json, the default).
+"""
+from abc import ABC, abstractmethod
+from typing import (Iterable, Iterator, List, Optional, Tuple, Type,
+                    TypeVar)
+
+
+class Store(ABC):
+    """ Storage backend of the objects of the Base classes
+
+    A backend missing one of the abstract methods can't be instantiated.
+    """
+
+    @abstractmethod
+    def load(self, cls: Type):
+        """ Prepare the storage of `cls`
+        """
+
+    @abstractmethod
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or replace an object
+        """
+
+    def save_many(self, cls: Type, objs: Iterable[TypeVar('Base')]) -> int:
+        """ Insert or replace many objects of `cls`, return their number
+        """
+        count = 0
+        for obj in objs:
+            self.save(obj)
+            count += 1
+        return count
+
+    @abstractmethod
+    def records(self, cls: Type) -> Iterator[Tuple[str, dict]]:
+        """ Yield the id and serializable form of every object of `cls`
+        """
+
+    @abstractmethod
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object
+        """
+
+    @abstractmethod
+    def count(self, cls: Type) -> int:
+        """ Count the objects of `cls`
+        """
+
+    @abstractmethod
+    def get(self, cls: Type, obj_id: str) -> TypeVar('Base'):
+        """ Return one object of `cls` by id, None if missing
+        """
+
+    @abstractmethod
+    def search(self, cls: Type,
+               attributes: dict) -> Iterable[TypeVar('Base')]:
+        """ Return the objects of `cls` with matching attributes
+        """
+
+    @abstractmethod
+    def page(self, cls: Type, limit: int, after: Tuple[str, str] = None
+             ) -> Tuple[List[TypeVar('Base')], Optional[Tuple[str, str]]]:
+        """ Return up to `limit` objects ordered by creation, after the
+        (created_at, id) key `after`, and the key of the next page
+        """
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+""" Tests of the Base store
+
+The store is configured by environment variables read at import time,
+so each mode is tested in processes of its own started in a temporary
+directory. Queries and locks are tested in this process, on the default
+JSON store.
+
+Run from the parent directory: python3 -m unittest models.test_base
+"""
+from datetime import datetime, timedelta
+from models import base
+from models.user import User
+from os import path
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+WRITER = """
+    import sys, time
+    from models.base import MULTIPROCESS
+    from models.user import User
+    from models.user_session import UserSession
+
+    n, count, total = map(int, sys.argv[1:])
+    User.load_from_file()
+    UserSession.load_from_file()
+    for i in range(count):
+        user = User(email="p{}-{}@holberton.io".format(n, i))
+        user.password = "pwd"
+        user.save()
+        UserSession(user_id=user.id, session_id="s{}-{}".format(n, i)).save()
+    deadline = time.time() + 60
+    while MULTIPROCESS and User.count() < total:
+        assert time.time() < deadline, User.count()
+        time.sleep(0.01)
+"""
+
+DUMP = """
+    import json
+    from models.base import DATA
+    from models.user import User
+
+    User.load_from_file()
+    users = sorted((user.to_json(True) for user in User.all()),
+                   key=lambda user: user["email"])
+    print(json.dumps([type(DATA["User"]).__name__, users]))
+"""
+
+
+def child_env(**env) -> dict:
+    """ Environment of a child process using the store of this tree
+    """
+    clean = {key: value for key, value in os.environ.items()
+             if not key.startswith("STORE_")}
+    return dict(clean, PYTHONPATH=ROOT, **env)
+
+
+def run(code: str, cwd: str, *args: str, **env) -> str:
+    """ Run `code` against the store in `cwd`, return its output
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)] + list(args),
+        cwd=cwd, env=child_env(**env), capture_output=True, text=True,
+        timeout=300)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout
+
+
+def save_users(cwd: str, count: int, **env):
+    """ Save `count` users in a child process
+    """
+    run("""
+        import sys
+        from models.user import User
+
+        User.load_from_file()
+        for i in range(int(sys.argv[1])):
+            user = User(email="u{}@holberton.io".format(i),
+                        first_name="Bob" if i % 2 else None)
+            user.password = "pwd"
+            user.save()
+    """, cwd, str(count), **env)
+
+
+def strip(user: dict) -> dict:
+    """ Serialized user without the values that differ between runs
+    """
+    return {key: value for key, value in user.items()
+            if key not in ("id", "created_at", "updated_at")}
+
+
+class TestMultiProcess(unittest.TestCase):
+    """ Several processes writing to the same store
+    """
+
+    def write(self, tmp: str, processes: int, count: int, **env):
+        """ Run the writing processes together, check they all succeed
+        """
+        children = [subprocess.Popen(
+            [sys.executable, "-c", textwrap.dedent(WRITER), str(n),
+             str(count), str(processes * count)], cwd=tmp,
+            env=child_env(**env), stderr=subprocess.PIPE, text=True)
+            for n in range(processes)]
+        for child in children:
+            _, err = child.communicate(timeout=300)
+            self.assertEqual(child.returncode, 0, err)
+
+    def check(self, processes: int, count: int, **env):
+        """ Every write of every process is on file and was seen by all
+        """
+        total = processes * count
+        with tempfile.TemporaryDirectory() as tmp:
+            self.write(tmp, processes, count, STORE_MULTIPROCESS="1", **env)
+            out = run("""
+                from models.user import User
+                from models.user_session import UserSession
+
+                User.load_from_file()
+                UserSession.load_from_file()
+                emails = {user.email for user in User.all()}
+                print(len(emails), User.count(), UserSession.count())
+            """, tmp, **env)
+            self.assertEqual(out.split(), [str(total)] * 3)
+            self.assertEqual([name for name in os.listdir(tmp)
+                              if name.endswith(".tmp") or ".json." in name],
+                             [])
+
+    def test_snapshot_mode(self):
+        """ Processes rewriting the snapshot lose no write
+        """
+        self.check(4, 25)
+
+    def test_separate_copies(self):
+        """ Without multi-process mode writes can be lost, but the
+        processes renaming their snapshots over each other don't fail
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            self.write(tmp, 4, 25)
+
+    def test_journal_mode(self):
+        """ Processes appending to the journal lose no write and replay
+        each other's records
+        """
+        self.check(4, 50, STORE_MODE="journal", STORE_COMPACT_EVERY="60")
+
+    def test_compact_keeps_other_writes(self):
+        """ A process compacting after another one saved keeps that save
+        """
+        env = {"STORE_MULTIPROCESS": "1", "STORE_MODE": "journal"}
+        with tempfile.TemporaryDirectory() as tmp:
+            save_users(tmp, 1, **env)
+            out = run("""
+                import subprocess, sys
+                from models.user import User
+
+                User.load_from_file()
+                subprocess.run([sys.executable, "-c", sys.argv[1]],
+                               check=True)
+                User.compact()
+                print(User.count())
+            """, tmp, textwrap.dedent("""
+                from models.user import User
+
+                User.load_from_file()
+                User(email="b@holberton.io").save()
+            """), **env)
+            self.assertEqual(out.split(), ["2"])
+            emails = [user["email"] for user in json.loads(run(DUMP, tmp))[1]]
+            self.assertEqual(emails, ["b@holberton.io", "u0@holberton.io"])
+
+
+class TestJournal(unittest.TestCase):
+    """ Journal mode
+    """
+
+    def test_torn_tail(self):
+        """ A record cut off by a crash is dropped along with what follows
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            save_users(tmp, 3, STORE_MODE="journal")
+            journal = path.join(tmp, ".db_User.journal")
+            size = path.getsize(journal)
+            with open(journal, "a") as f:
+                f.write('{"op": "save", "id": "torn", "obj": {"id"')
+            out = run("""
+                from models.user import User
+
+                User.load_from_file()
+                print(User.count(), User.get("torn"))
+            """, tmp, STORE_MODE="journal")
+            self.assertEqual(out.split(), ["3", "None"])
+            self.assertEqual(path.getsize(journal), size)
+
+    def test_same_as_snapshot(self):
+        """ Replaying the journal gives the objects a snapshot holds
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            save_users(tmp, 20, STORE_MODE="journal")
+            journaled = json.loads(run(DUMP, tmp, STORE_MODE="journal"))
+            run("""
+                from models.user import User
+
+                User.load_from_file()
+                User.compact()
+            """, tmp, STORE_MODE="journal")
+            self.assertFalse(path.exists(path.join(tmp, ".db_User.journal")))
+            self.assertEqual(json.loads(run(DUMP, tmp)), journaled)
+
+
+class TestWriteBehind(unittest.TestCase):
+    """ Write-behind mode
+    """
+
+    WAIT = """
+        deadline = time.time() + 30
+        while not base.WRITE_BEHIND.stats()["flushes"]:
+            assert time.time() < deadline
+            time.sleep(0.01)
+    """
+
+    def saved(self, code: str, **env) -> list:
+        """ Save 7 users, run `code`, then print the users loaded, the
+        users on file and the flush count
+        """
+        code = textwrap.dedent("""
+            import json, time
+            from models import base
+            from models.user import User
+
+            User.load_from_file()
+            for i in range(7):
+                User(email="u{}@holberton.io".format(i)).save()
+        """) + textwrap.dedent(code) + textwrap.dedent("""
+            try:
+                with open(".db_User.json") as f:
+                    on_file = len(json.load(f))
+            except FileNotFoundError:
+                on_file = 0
+            print(User.count(), on_file,
+                  base.WRITE_BEHIND.stats()["flushes"])
+        """)
+        with tempfile.TemporaryDirectory() as tmp:
+            return run(code, tmp, **env).split()
+
+    def test_interval(self):
+        """ Changes are saved once the interval has passed
+        """
+        self.assertEqual(self.saved(self.WAIT, STORE_FLUSH_INTERVAL="0.05"),
+                         ["7", "7", "1"])
+
+    def test_max_changes(self):
+        """ Changes are saved early once enough of them piled up
+        """
+        self.assertEqual(self.saved(self.WAIT, STORE_FLUSH_INTERVAL="60",
+                                    STORE_FLUSH_CHANGES="7"),
+                         ["7", "7", "1"])
+
+    def test_flush(self):
+        """ flush() saves the pending changes now, held back until then
+        """
+        self.assertEqual(self.saved("""
+            assert base.WRITE_BEHIND.stats()["pending_changes"] == 7
+            assert not base.path.exists(".db_User.json")
+            base.flush()
+        """, STORE_FLUSH_INTERVAL="60"), ["7", "7", "1"])
+
+    def test_reload(self):
+        """ Reloading a class saves its pending changes first
+        """
+        self.assertEqual(self.saved("""
+            User.load_from_file()
+        """, STORE_FLUSH_INTERVAL="60"), ["7", "7", "1"])
+
+
+class TestFormats(unittest.TestCase):
+    """ Lazy hydration and the binary snapshot format
+    """
+
+    def test_lazy_load(self):
+        """ Lazy loading gives the objects of an eager load, building
+        only the ones accessed
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            save_users(tmp, 20)
+            eager = json.loads(run(DUMP, tmp))
+            lazy = json.loads(run(DUMP, tmp, STORE_LAZY_LOAD="1"))
+            self.assertEqual(eager[0], "dict")
+            self.assertEqual(lazy, ["LazyObjects", eager[1]])
+            out = run("""
+                from models.base import DATA
+                from models.user import User
+
+                User.load_from_file()
+                users = User.search({"email": "u3@holberton.io"})
+                print(len(users), DATA["User"].hydrated())
+            """, tmp, STORE_LAZY_LOAD="1")
+            self.assertEqual(out.split(), ["1", "1"])
+
+    def test_binary_snapshot(self):
+        """ Binary snapshots, compressed or not, hold the same objects
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            save_users(tmp, 20)
+            expected = json.loads(run(DUMP, tmp))
+        for compress in ("none", "zlib", "lzma"):
+            with self.subTest(compress=compress), \
+                    tempfile.TemporaryDirectory() as tmp:
+                env = {"STORE_SNAPSHOT_FORMAT": "binary",
+                       "STORE_COMPRESS": compress}
+                save_users(tmp, 20, **env)
+                self.assertTrue(path.exists(path.join(tmp, ".db_User.bin")))
+                dumped = json.loads(run(DUMP, tmp, **env))
+                self.assertEqual([strip(user) for user in dumped[1]],
+                                 [strip(user) for user in expected[1]])
+
+
+class TestInProcess(unittest.TestCase):
+    """ Queries and concurrent access on the default store
+    """
+
+    def setUp(self):
+        """ Start from an empty store in a temporary directory
+        """
+        if base.BACKEND is not None or base.LAZY_LOAD:
+            self.skipTest("needs the default JSON store")
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        User.load_from_file()
+
+    def tearDown(self):
+        """ Leave the temporary directory
+        """
+        User.load_from_file()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def make_users(self, count: int) -> list:
+        """ Store `count` users created a minute apart, in random order
+        """
+        start = datetime(2024, 1, 1)
+        users = [User(email="{:04}@holberton.io".format(i),
+                      first_name=random.choice(("Al", "Bob", None)),
+                      created_at=(start + timedelta(minutes=i)).strftime(
+                          base.TIMESTAMP_FORMAT))
+                 for i in random.sample(range(count), count)]
+        User.save_many(users)
+        return users
+
+    def test_query(self):
+        """ Queries return what filtering every object returns
+        """
+        random.seed(0)
+        self.make_users(300)
+        cut = datetime(2024, 1, 1, 2)
+        cases = [
+            ({"email": "0042@holberton.io"}, None, None),
+            ({"email__ge": "0100", "email__lt": "0200"}, "-email", 7),
+            ({"email__startswith": "01"}, "email", None),
+            ({"created_at__lt": cut, "first_name": "Bob"}, "created_at", 5),
+            ({"created_at__ge": cut}, "-created_at", 10),
+            ({"first_name__gt": "Al"}, "first_name", 12),
+            ({}, "created_at", 25),
+        ]
+        everyone = User.all()
+        for filters, order_by, limit in cases:
+            with self.subTest(filters=filters, order_by=order_by):
+                conditions = base.query.parse_filters(filters)
+                expected = [user for user in everyone
+                            if base.query.matches(user, conditions)]
+                if order_by is not None:
+                    attr = order_by.lstrip("-")
+                    if attr == "created_at":
+                        key = base._order_key
+                    else:
+                        def key(user):
+                            value = getattr(user, attr)
+                            return (value is not None, value, user.id)
+                    expected.sort(key=key, reverse=order_by[0] == "-")
+                found = list(User.query(order_by=order_by, limit=limit,
+                                        **filters))
+                if order_by is None:
+                    found.sort(key=lambda user: user.id)
+                    expected.sort(key=lambda user: user.id)
+                self.assertEqual([user.id for user in found],
+                                 [user.id for user in expected][:limit])
+
+    def test_concurrent_writes(self):
+        """ Threads moving users in the creation order while others page
+        through it keep each user in the order exactly once
+        """
+        random.seed(1)
+        users = self.make_users(200)
+        stop = time.time() + 1
+        errors = []
+
+        def writer():
+            try:
+                while time.time() < stop:
+                    user = User.get(random.choice(users).id)
+                    user.created_at += timedelta(seconds=random.randint(
+                        -3600, 3600))
+                    user.save()
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                while time.time() < stop:
+                    page, _ = User.page(len(users))
+                    ids = [user.id for user in page]
+                    if len(set(ids)) != len(ids):
+                        errors.append("a user is paged twice")
+                    User.search({"email": random.choice(users).email})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=target)
+                   for target in (writer, writer, reader, reader)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+        ids, after = [], None
+        while True:
+            page, after = User.page(7, after)
+            ids += [user.id for user in page]
+            if after is None:
+                break
+        self.assertEqual(sorted(ids), sorted(user.id for user in users))
+        self.assertEqual(len(base._ordered("User")), len(users))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+""" Tests of the binary snapshot format
+
+Run from the parent directory: python3 -m unittest models.test_snapshot
+"""
+from models import snapshot
+import io
+import json
+import unittest
+import uuid
+
+
+def records(count: int) -> list:
+    """ (id, record) pairs of serialized users
+    """
+    pairs = []
+    for i in range(count):
+        obj_id = str(uuid.uuid4())
+        pairs.append((obj_id, {
+            "id": obj_id, "created_at": "2024-01-01T00:00:{:02}".format(i),
+            "updated_at": "2024-02-01T00:00:00",
+            "email": "u{}@holberton.io".format(i),
+            "_password": None, "first_name": "Bob" if i % 2 else None,
+            "last_name": None}))
+    return pairs
+
+
+def roundtrip(pairs: list, compress: str = "none") -> list:
+    """ Dump the pairs to a binary snapshot and load them back
+    """
+    f = io.BytesIO()
+    snapshot.dump(pairs, f, compress)
+    f.seek(0)
+    return list(snapshot.load(f))
+
+
+class TestSnapshot(unittest.TestCase):
+    """ Dumping and loading binary snapshots
+    """
+
+    def assertSame(self, pairs: list, loaded: list):
+        """ Loaded pairs equal the dumped ones, keys in the same order
+        """
+        self.assertEqual(json.dumps(loaded), json.dumps(pairs))
+
+    def test_compressors(self):
+        """ Records come back unchanged with every compressor
+        """
+        pairs = records(50)
+        for compress in snapshot.COMPRESSORS:
+            with self.subTest(compress=compress):
+                self.assertSame(pairs, roundtrip(pairs, compress))
+
+    def test_empty(self):
+        """ An empty snapshot loads as no records
+        """
+        self.assertEqual(roundtrip([]), [])
+
+    def test_heterogeneous_records(self):
+        """ Records with other keys, in another order, or with values
+        that can't be packed keep them as they were
+        """
+        pairs = records(4)
+        pairs[1][1]["session_id"] = "abc"
+        pairs[2] = (pairs[2][0], dict(reversed(list(pairs[2][1].items()))))
+        del pairs[3][1]["updated_at"]
+        pairs.append(("not-a-uuid", {"id": "not-a-uuid",
+                                     "created_at": "yesterday"}))
+        self.assertSame(pairs, roundtrip(pairs, "zlib"))
+
+    def test_bad_header(self):
+        """ Files that aren't a snapshot of this version are refused
+        """
+        f = io.BytesIO()
+        snapshot.dump(records(1), f)
+        data = f.getvalue()
+        for bad in (b"{}" + data, data[:8] + b"\x09" + data[9:]):
+            with self.subTest(bad=bad[:10]):
+                with self.assertRaises(ValueError):
+                    list(snapshot.load(io.BytesIO(bad)))
+
+
+if __name__ == "__main__":
+    unittest.main()
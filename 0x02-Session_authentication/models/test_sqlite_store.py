@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+""" Tests of the SQLite store
+
+Each test uses a store of its own on a temporary database, used directly
+rather than through STORE_BACKEND.
+
+Run from the parent directory: python3 -m unittest models.test_sqlite_store
+"""
+from datetime import datetime, timedelta
+from models.base import Base, COMPACT, TIMESTAMP_FORMAT
+from models.sqlite_store import SQLiteStore
+from models.store import Store
+from os import path
+import tempfile
+import unittest
+
+
+class Device(Base):
+    """ Model with an indexed attribute, a flag and a free attribute
+    """
+
+    indexes = ('owner',)
+    if COMPACT:
+        __slots__ = ('owner', 'active', 'name')
+
+    def __init__(self, *args: list, **kwargs: dict):
+        """ Initialize a Device instance
+        """
+        super().__init__(*args, **kwargs)
+        self.owner = kwargs.get('owner')
+        self.active = kwargs.get('active')
+        self.name = kwargs.get('name')
+
+
+def devices(count: int) -> list:
+    """ Devices created a minute apart, cycling through the values of
+    each attribute, None included
+    """
+    start = datetime(2024, 1, 1)
+    return [Device(owner=(None, "al", "bob")[i % 3],
+                   active=(None, True, False)[i // 2 % 3],
+                   name=None if i % 4 == 0 else "d{}".format(i),
+                   created_at=(start + timedelta(minutes=i)).strftime(
+                       TIMESTAMP_FORMAT))
+            for i in range(count)]
+
+
+class TestSQLiteStore(unittest.TestCase):
+    """ Saving, searching and paging objects in SQLite
+    """
+
+    def setUp(self):
+        """ Open a store on an empty temporary database
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SQLiteStore(path.join(self.tmp.name, "test.sqlite3"))
+        self.store.load(Device)
+
+    def tearDown(self):
+        """ Close the connection and remove the database
+        """
+        self.store._connection().close()
+        self.tmp.cleanup()
+
+    def test_save_many(self):
+        """ Objects saved at once are all stored, replacing older copies
+        """
+        objs = devices(30)
+        self.assertEqual(self.store.save_many(Device, objs), 30)
+        objs[0].name = "renamed"
+        self.assertEqual(self.store.save_many(Device, objs[:5]), 5)
+        self.assertEqual(self.store.count(Device), 30)
+        self.assertEqual(self.store.get(Device, objs[0].id).name, "renamed")
+        self.assertEqual(dict(self.store.records(Device))[objs[1].id],
+                         objs[1].to_json(True))
+        self.store.remove(objs[1])
+        self.assertEqual(self.store.count(Device), 29)
+        self.assertIsNone(self.store.get(Device, objs[1].id))
+
+    def test_search(self):
+        """ Searches through the indexed columns, json_extract and the
+        Python fallback find what filtering every object finds
+        """
+        objs = devices(30)
+        self.store.save_many(Device, objs)
+        cut = datetime(2024, 1, 1, 0, 9)
+        cases = [
+            {"owner": "al"},
+            {"owner": None},
+            {"id": objs[7].id},
+            {"name": "d5"},
+            {"name": None},
+            {"active": True},
+            {"active": False},
+            {"active": None},
+            {"owner": "bob", "active": False},
+            {"created_at": cut},
+            {"owner": None, "created_at": cut},
+            {},
+        ]
+        for attributes in cases:
+            with self.subTest(attributes=attributes):
+                expected = [obj.id for obj in objs
+                            if all(getattr(obj, key) == value
+                                   for key, value in attributes.items())]
+                self.assertTrue(expected)
+                found = self.store.search(Device, attributes)
+                self.assertEqual([obj.id for obj in found], expected)
+
+    def test_page(self):
+        """ Following the cursors visits every object once, in order
+        """
+        objs = devices(23)
+        self.store.save_many(Device, reversed(objs))
+        for limit in (1, 5, 23, 30):
+            with self.subTest(limit=limit):
+                ids, after, pages = [], None, 0
+                while True:
+                    page, after = self.store.page(Device, limit, after)
+                    self.assertLessEqual(len(page), limit)
+                    ids += [obj.id for obj in page]
+                    pages += 1
+                    if after is None:
+                        break
+                self.assertEqual(ids, [obj.id for obj in objs])
+                self.assertEqual(pages, -(-len(objs) // limit))
+
+
+class TestStore(unittest.TestCase):
+    """ The Store interface
+    """
+
+    def test_incomplete_backend(self):
+        """ A backend missing a method can't be instantiated
+        """
+        class Incomplete(Store):
+            def load(self, cls):
+                pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+        self.assertIsInstance(SQLiteStore(":memory:"), Store)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,13 +2,23 @@
 """ User module
 """
 import hashlib
-from models.base import Base
+from models.base import Base, COMPACT
+
+
+def hash_password(pwd: str) -> str:
+    """ Encrypt a password in SHA256
+    """
+    return hashlib.sha256(pwd.encode()).hexdigest().lower()
 
 
 class User(Base):
     """ User class
     """
 
+    indexes = ('email',)
+    if COMPACT:
+        __slots__ = ('email', '_password', 'first_name', 'last_name')
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """
@@ -31,7 +41,7 @@ class User(Base):
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = hash_password(pwd)
 
     def is_valid_password(self, pwd: str) -> bool:
         """ Validate a password
@@ -40,8 +50,7 @@ class User(Base):
             return False
         if self.password is None:
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        return hash_password(pwd) == self.password
 
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
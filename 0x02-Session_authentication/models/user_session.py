@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 """ UserSession module
 """
-from .base import Base
+from .base import Base, COMPACT
 
 
 class UserSession(Base):
     """User Session that enables storage of session IDs in db."""
+    indexes = ('session_id',)
+    if COMPACT:
+        __slots__ = ('user_id', 'session_id')
+
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a UserSession instance."""
         super().__init__(*args, **kwargs)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+""" Write-behind module
+
+Batches the snapshot rewrites of the JSON store: changes only mark a
+class dirty and a background thread saves the dirty classes at most once
+per interval, or as soon as enough changes have piled up.
+"""
+from typing import Optional, Type
+import atexit
+import threading
+import time
+
+
+class WriteBehind():
+    """ Background flusher of the dirty classes of the store
+    """
+
+    def __init__(self, interval: float, max_changes: int = 100):
+        """ Initialize the flusher, flushing once more at exit
+        """
+        self.interval = interval
+        self.max_changes = max_changes
+        self._dirty = {}
+        self._changes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._flushes = 0
+        self._total = 0.0
+        self._max = 0.0
+        atexit.register(self.flush)
+
+    def mark(self, cls: Type):
+        """ Record a change to `cls`, to be saved by the next flush
+        """
+        with self._lock:
+            self._dirty[cls.__name__] = cls
+            self._changes += 1
+            changes = self._changes
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="write-behind",
+                                                daemon=True)
+                self._thread.start()
+        if changes >= self.max_changes:
+            self._wakeup.set()
+
+    def flush(self, cls: Optional[Type] = None):
+        """ Save every dirty class now, or only `cls` if given
+        """
+        with self._flush_lock:
+            with self._lock:
+                if cls is None:
+                    dirty = self._dirty
+                    self._dirty = {}
+                elif cls.__name__ in self._dirty:
+                    dirty = {cls.__name__: self._dirty.pop(cls.__name__)}
+                else:
+                    dirty = {}
+                if not self._dirty:
+                    self._changes = 0
+            if not dirty:
+                return
+            start = time.perf_counter()
+            for cls in dirty.values():
+                cls.save_to_file()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._flushes += 1
+                self._total += elapsed
+                self._max = max(self._max, elapsed)
+
+    def stats(self) -> dict:
+        """ Flush count, pending changes and flush latencies in ms
+        """
+        with self._lock:
+            flushes = self._flushes
+            return {
+                'flushes': flushes,
+                'pending_changes': self._changes,
+                'dirty_classes': sorted(self._dirty),
+                'flush_avg_ms': (self._total / flushes * 1000
+                                 if flushes else 0.0),
+                'flush_max_ms': self._max * 1000,
+            }
+
+    def _run(self):
+        """ Flush every `interval` seconds or when woken up early
+        """
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
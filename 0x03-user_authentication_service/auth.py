@@ -3,6 +3,8 @@
 from sqlalchemy.orm.exc import NoResultFound
 
 import bcrypt
+import os
+import time
 from typing import Optional, Union
 from uuid import uuid4
 
@@ -10,6 +12,56 @@ from db import DB
 from user import User
 
 
+_bcrypt_cost = int(os.getenv('BCRYPT_COST', 12))
+_min_bcrypt_cost = int(os.getenv('BCRYPT_MIN_COST', 10))
+_allow_cost_downgrade = os.getenv('BCRYPT_ALLOW_DOWNGRADE', '0') == '1'
+
+
+def _calibrate_cost(target_ms: float = 250.0,
+                    min_cost: int = _min_bcrypt_cost,
+                    max_cost: int = 31) -> int:
+    """Pick the highest bcrypt cost hashing within `target_ms`.
+
+    Each cost is timed on this machine in turn and timing stops as soon
+    as the next cost, twice as slow, would exceed the budget. The chosen
+    cost is used for every new hash.
+
+    Args:
+        target_ms (float): latency budget of one hash in milliseconds.
+        min_cost (int): lowest cost to pick even if it is over budget,
+                        `BCRYPT_MIN_COST` (default 10) by default.
+        max_cost (int): highest cost to consider.
+    Return:
+        int: the chosen cost.
+    """
+    global _bcrypt_cost
+    cost = min_cost
+    for rounds in range(min_cost, max_cost + 1):
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+        elapsed = (time.perf_counter() - start) * 1000
+        if elapsed > target_ms:
+            break
+        cost = rounds
+        if elapsed * 2 > target_ms:
+            break
+    _bcrypt_cost = cost
+    return cost
+
+
+def _hash_cost(hashed_password: bytes) -> int:
+    """Return the cost a bcrypt hash such as `$2b$12$...` was made with."""
+    return int(hashed_password.split(b'$')[2])
+
+
+def _needs_rehash(hashed_password: bytes) -> bool:
+    """Whether a hash should be redone with the current cost: a lower
+    cost always, a higher one only if `BCRYPT_ALLOW_DOWNGRADE=1`."""
+    cost = _hash_cost(hashed_password)
+    return cost < _bcrypt_cost or (cost > _bcrypt_cost
+                                   and _allow_cost_downgrade)
+
+
 def _hash_password(password: str) -> bytes:
     """Return the computed salt hash of the input password.
 
@@ -19,7 +71,11 @@ def _hash_password(password: str) -> bytes:
         bytes: salt hash of the input password.
     """
     password = password.encode()
-    return bcrypt.hashpw(password, bcrypt.gensalt())
+    return bcrypt.hashpw(password, bcrypt.gensalt(_bcrypt_cost))
+
+
+if os.getenv('BCRYPT_TARGET_MS'):
+    _calibrate_cost(float(os.getenv('BCRYPT_TARGET_MS')))
 
 
 def _generate_uuid() -> str:
@@ -56,7 +112,9 @@ class Auth:
 
         Validation first confirms the existence of a user by the supplied
         email then confirms that the supplied password matches the hashed
-        password stored in the database.
+        password stored in the database. A matching password whose hash
+        was made with a lower cost than the current one is rehashed; a
+        higher cost is only lowered if `BCRYPT_ALLOW_DOWNGRADE=1`.
         Args:
             email (str): user's email.
             password (str): user's password.
@@ -67,7 +125,12 @@ class Auth:
             user = self._db.find_user_by(email=email)
         except NoResultFound:
             return False
-        return bcrypt.checkpw(password.encode(), user.hashed_password)
+        if not bcrypt.checkpw(password.encode(), user.hashed_password):
+            return False
+        if _needs_rehash(user.hashed_password):
+            self._db.update_user(user.id,
+                                 hashed_password=_hash_password(password))
+        return True
 
     def create_session(self, email: str) -> Optional[str]:
         """Create a session_id for a user with the specified email address.